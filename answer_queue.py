@@ -0,0 +1,78 @@
+import asyncio
+import time
+import logging
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerQueue:
+    def __init__(self, handler, maxsize: int, batch_size: int):
+        self.handler = handler
+        self.batch_size = batch_size
+        self._queue = asyncio.Queue(maxsize=maxsize)
+        self._task = None
+        self.lag = Histogram()
+        self.dropped = 0
+        self.processed = 0
+        self.batches = 0
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def put(self, poll_answer) -> bool:
+        try:
+            self._queue.put_nowait((time.monotonic(), poll_answer))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Answer queue full, dropped {self.dropped} answers so far")
+            return False
+        
+        return True
+    
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            
+            now = time.monotonic()
+            by_poll = {}
+            
+            for enqueued_at, poll_answer in batch:
+                self.lag.observe((now - enqueued_at) * 1000)
+                by_poll.setdefault(poll_answer.poll_id, []).append(poll_answer)
+            
+            for poll_id, answers in by_poll.items():
+                try:
+                    await self.handler(poll_id, answers)
+                except Exception as e:
+                    logger.error(f"Error processing {len(answers)} answers for poll {poll_id}: {e}")
+            
+            self.processed += len(batch)
+            self.batches += 1
+    
+    def stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize(),
+            "maxsize": self._queue.maxsize,
+            "processed": self.processed,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "lag_ms": self.lag.summary()
+        }
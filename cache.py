@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float, on_evict=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        # _data is in least-recently-used order for eviction; _expiry is in insertion
+        # order, which with one ttl for every entry is also the order they expire in
+        self._data = OrderedDict()
+        self._expiry = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def __contains__(self, key):
+        expires_at = self._expiry.get(key)
+        return expires_at is not None and expires_at > time.monotonic()
+    
+    def get(self, key, default=None):
+        expires_at = self._expiry.get(key)
+        
+        if expires_at is None:
+            self.misses += 1
+            return default
+        
+        value = self._data[key]
+        
+        if expires_at <= time.monotonic():
+            self._expire(key, value)
+            self.misses += 1
+            return default
+        
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._expiry[key] = time.monotonic() + self.ttl
+        self._expiry.move_to_end(key)
+        
+        while len(self._data) > self.maxsize:
+            evicted_key, evicted = self._data.popitem(last=False)
+            del self._expiry[evicted_key]
+            self.evictions += 1
+            
+            if self.on_evict is not None:
+                self.on_evict(evicted_key, evicted, False)
+    
+    def _expire(self, key, value):
+        del self._data[key]
+        del self._expiry[key]
+        self.expirations += 1
+        
+        if self.on_evict is not None:
+            self.on_evict(key, value, True)
+    
+    def purge_expired(self, limit: int = 100) -> int:
+        now = time.monotonic()
+        purged = 0
+        
+        while self._expiry and purged < limit:
+            key, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now:
+                break
+            
+            self._expire(key, self._data[key])
+            purged += 1
+        
+        return purged
+    
+    def invalidate(self, key):
+        self._data.pop(key, None)
+        self._expiry.pop(key, None)
+    
+    def clear(self):
+        self._data.clear()
+        self._expiry.clear()
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits / lookups * 100) if lookups > 0 else 0
+        }
@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import os
+import sys
+import logging
+from config import Config
+from database import Database
+from utils import parse_bulk_file, format_import_report
+from export import write_results, EXPORT_FIELDS, EXPORT_FORMATS
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def import_command(db: Database, args):
+    file_ext = os.path.splitext(args.path)[1].lstrip(".").lower()
+    
+    if file_ext not in ["csv", "txt", "zip"]:
+        raise SystemExit("Expected a .csv, .txt or .zip file")
+    
+    entries = parse_bulk_file(args.path, file_ext, args.time)
+    report = await db.import_quizzes(args.creator_id, entries)
+    print(format_import_report(report, limit=len(report)))
+
+
+async def migrate_questions_command(db: Database, args):
+    migrated = await db.migrate_embedded_questions(args.batch_size)
+    print(f"Migrated {migrated} quizzes")
+
+
+async def rebuild_stats_command(db: Database, args):
+    processed = await db.rebuild_stats(args.batch_size)
+    print(f"Rebuilt user and quiz stats from {processed} results")
+
+
+async def export_command(db: Database, args):
+    rows = db.iter_results(args.quiz_id, EXPORT_FIELDS, args.batch_size)
+    
+    if args.output == "-":
+        exported = await write_results(rows, args.format, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            exported = await write_results(rows, args.format, out)
+    
+    logger.info(f"Exported {exported} results for quiz {args.quiz_id}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Quiz bot maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    import_parser = commands.add_parser("import", help="Bulk import quizzes from a TXT, CSV or ZIP file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--creator-id", type=int, required=True, help="Telegram user id that will own the quizzes")
+    import_parser.add_argument("--time", type=int, default=Config.DEFAULT_QUESTION_TIME, help="Default seconds per question")
+    import_parser.set_defaults(handler=import_command)
+    
+    migrate_parser = commands.add_parser(
+        "migrate-questions", help="Move embedded quiz questions into the shared questions collection"
+    )
+    migrate_parser.add_argument("--batch-size", type=int, default=100)
+    migrate_parser.set_defaults(handler=migrate_questions_command)
+    
+    stats_parser = commands.add_parser(
+        "rebuild-stats", help="Recompute user_stats and quiz_stats from results (run while no quizzes are finishing)"
+    )
+    stats_parser.add_argument("--batch-size", type=int, default=1000)
+    stats_parser.set_defaults(handler=rebuild_stats_command)
+    
+    export_parser = commands.add_parser("export", help="Stream a quiz's results as CSV or NDJSON")
+    export_parser.add_argument("quiz_id")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    export_parser.add_argument("--output", default="-", help="File to write, or - for stdout")
+    export_parser.add_argument("--batch-size", type=int, default=Config.EXPORT_BATCH_SIZE)
+    export_parser.set_defaults(handler=export_command)
+    
+    return parser
+
+
+async def main():
+    args = build_parser().parse_args()
+    
+    db = Database()
+    await db.connect()
+    await args.handler(db, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
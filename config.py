@@ -6,9 +6,66 @@ load_dotenv()
 
 class Config:
     BOT_TOKEN = os.getenv("BOT_TOKEN")
-    API_ID = int(os.getenv("API_ID"))
+    API_ID = int(os.getenv("API_ID", 0))
     API_HASH = os.getenv("API_HASH")
     MONGO_URL = os.getenv("MONGO_URL")
+    RESULT_BATCH_SIZE = int(os.getenv("RESULT_BATCH_SIZE", 500))
+    LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", 50))
+    FIRST_QUESTION_DELAY = int(os.getenv("FIRST_QUESTION_DELAY", 3))
+    QUESTION_GAP = float(os.getenv("QUESTION_GAP", 2))
+    POLL_RETIRE_GRACE = int(os.getenv("POLL_RETIRE_GRACE", 5))
+    ANSWER_QUEUE_SIZE = int(os.getenv("ANSWER_QUEUE_SIZE", 100000))
+    ANSWER_BATCH_SIZE = int(os.getenv("ANSWER_BATCH_SIZE", 500))
+    CHECKPOINT_INTERVAL = int(os.getenv("CHECKPOINT_INTERVAL", 5))
+    SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", 30))
+    SEND_GROUP_RATE = float(os.getenv("SEND_GROUP_RATE", 20))
+    SEND_GROUP_BURST = float(os.getenv("SEND_GROUP_BURST", 3))
+    SEND_PRIVATE_RATE = float(os.getenv("SEND_PRIVATE_RATE", 1))
+    SEND_CONCURRENCY = int(os.getenv("SEND_CONCURRENCY", 50))
+    SEND_MAX_ATTEMPTS = int(os.getenv("SEND_MAX_ATTEMPTS", 5))
+    SEND_BUCKET_LIMIT = int(os.getenv("SEND_BUCKET_LIMIT", 10000))
+    INGEST_EXECUTOR = os.getenv("INGEST_EXECUTOR", "thread")
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 2))
+    INGEST_TIMEOUT = float(os.getenv("INGEST_TIMEOUT", 30))
+    LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", 0.5))
+    LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", 100))
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 100))
+    DEFAULT_QUESTION_TIME = int(os.getenv("DEFAULT_QUESTION_TIME", 30))
+    QUIZ_CACHE_SIZE = int(os.getenv("QUIZ_CACHE_SIZE", 1000))
+    QUIZ_CACHE_TTL = int(os.getenv("QUIZ_CACHE_TTL", 600))
+    QUESTION_CACHE_SIZE = int(os.getenv("QUESTION_CACHE_SIZE", 20000))
+    CHECK_QUERY_PLANS = os.getenv("CHECK_QUERY_PLANS", "true").lower() == "true"
+    SHARD_COUNT = int(os.getenv("SHARD_COUNT", 1))
+    SHARD_SOCKET = os.getenv("SHARD_SOCKET", "/tmp/quizbot-shards.sock")
+    SHARD_TIMEOUT = float(os.getenv("SHARD_TIMEOUT", 10))
+    STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    CONVERSATION_TTL = int(os.getenv("CONVERSATION_TTL", 900))
+    CONVERSATION_LIMIT = int(os.getenv("CONVERSATION_LIMIT", 10000))
+    CONVERSATION_MAX_BYTES = int(os.getenv("CONVERSATION_MAX_BYTES", 262144))
+    LIVE_SCOREBOARD = os.getenv("LIVE_SCOREBOARD", "false").lower() == "true"
+    SCOREBOARD_INTERVAL = float(os.getenv("SCOREBOARD_INTERVAL", 10))
+    SCOREBOARD_SIZE = int(os.getenv("SCOREBOARD_SIZE", 10))
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 10000))
+    MONGO_RETRY_WRITES = os.getenv("MONGO_RETRY_WRITES", "true").lower() == "true"
+    MONGO_RESULTS_W = os.getenv("MONGO_RESULTS_W", "1")
+    MONGO_RESULTS_JOURNAL = os.getenv("MONGO_RESULTS_JOURNAL", "false").lower() == "true"
+    MONGO_HEALTH_INTERVAL = float(os.getenv("MONGO_HEALTH_INTERVAL", 10))
+    MONGO_SLOW_MS = float(os.getenv("MONGO_SLOW_MS", 500))
+    RESULT_BUFFER_LIMIT = int(os.getenv("RESULT_BUFFER_LIMIT", 100000))
+    TOP_LEADERBOARD_SIZE = int(os.getenv("TOP_LEADERBOARD_SIZE", 20))
+    LEADERBOARD_REFRESH_INTERVAL = float(os.getenv("LEADERBOARD_REFRESH_INTERVAL", 300))
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+    REAPER_BATCH_SIZE = int(os.getenv("REAPER_BATCH_SIZE", 1000))
+    REAPER_PAUSE = float(os.getenv("REAPER_PAUSE", 0.2))
+    REAPER_INTERVAL = float(os.getenv("REAPER_INTERVAL", 60))
+    ATTEMPT_CACHE_SIZE = int(os.getenv("ATTEMPT_CACHE_SIZE", 100000))
+    ATTEMPT_CACHE_TTL = int(os.getenv("ATTEMPT_CACHE_TTL", 86400))
+    ADMIN_IDS = {int(admin_id) for admin_id in os.getenv("ADMIN_IDS", "").split(",") if admin_id.strip()}
     
     @classmethod
     def validate(cls):
@@ -0,0 +1,94 @@
+import json
+from cache import TTLCache
+from state import MemoryStateStore
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationTooLarge(ValueError):
+    pass
+
+
+class ConversationStore:
+    def __init__(self, state, maxsize: int, ttl: float, max_bytes: int):
+        self.state = state
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.rejected = 0
+        self._sizes = {}
+        # Remembers who lost a session so their next step can be told it expired
+        self._expired = TTLCache(maxsize, ttl)
+        
+        if isinstance(state, MemoryStateStore):
+            self.local = TTLCache(maxsize, ttl, on_evict=self._on_evict)
+            self._sessions = None
+        else:
+            self.local = None
+            # Shared backends expire sessions on their own, so remember who was
+            # given one to tell a late step apart from a user who never started
+            self._sessions = TTLCache(maxsize, 2 * ttl)
+    
+    def _on_evict(self, user_id: int, state: dict, expired: bool):
+        self.total_bytes -= self._sizes.pop(user_id, 0)
+        self._expired.put(user_id, True)
+    
+    async def get(self, user_id: int):
+        if self.local is not None:
+            return self.local.get(user_id)
+        
+        state = await self.state.get(f"conversation:{user_id}")
+        
+        if state is None and self._sessions.get(user_id) is not None:
+            self._sessions.invalidate(user_id)
+            self._expired.put(user_id, True)
+        
+        return state
+    
+    async def set(self, user_id: int, state: dict):
+        size = len(json.dumps(state, ensure_ascii=False).encode("utf-8"))
+        
+        if size > self.max_bytes:
+            self.rejected += 1
+            raise ConversationTooLarge(f"Session data too large ({size // 1024} KB, max {self.max_bytes // 1024} KB)")
+        
+        self._expired.invalidate(user_id)
+        
+        if self.local is None:
+            await self.state.set(f"conversation:{user_id}", state, ttl=self.ttl)
+            self._sessions.put(user_id, True)
+            return
+        
+        self.local.purge_expired()
+        self.total_bytes += size - self._sizes.get(user_id, 0)
+        self._sizes[user_id] = size
+        self.local.put(user_id, state)
+    
+    async def delete(self, user_id: int):
+        if self.local is None:
+            self._sessions.invalidate(user_id)
+            await self.state.delete(f"conversation:{user_id}")
+            return
+        
+        self.local.invalidate(user_id)
+        self.total_bytes -= self._sizes.pop(user_id, 0)
+    
+    def is_expired(self, user_id: int) -> bool:
+        return user_id in self._expired
+    
+    def stats(self) -> dict:
+        stats = {
+            "backend": "memory" if self.local is not None else type(self.state).__name__,
+            "rejected": self.rejected,
+            "max_bytes": self.max_bytes
+        }
+        
+        if self.local is not None:
+            stats.update(self.local.stats())
+            stats["bytes"] = self.total_bytes
+        else:
+            stats["tracked_sessions"] = len(self._sessions)
+        
+        return stats
+
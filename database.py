@@ -1,11 +1,27 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, UpdateOne, WriteConcern
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from config import Config
+from cache import TTLCache
+from metrics import Histogram, CommandLatencyListener
+from utils import quiz_content_hash, question_doc, normalize_question, question_hash
+from types import MappingProxyType
 import uuid
 import logging
-from datetime import datetime
+import asyncio
+import time
+from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+LEADERBOARD_WINDOWS = {"daily": timedelta(days=1), "weekly": timedelta(days=7)}
+QUIZ_ID_ATTEMPTS = 5
+# Indexes on the stats collections, also built on the copies rebuild_stats swaps in
+STATS_INDEXES = {
+    "user_stats": [([("correct", DESCENDING)], {})],
+    "quiz_stats": []
+}
+
 
 class Database:
     def __init__(self):
@@ -13,54 +29,522 @@ class Database:
         self.db = None
         self.quizzes = None
         self.results = None
+        self.quiz_runs = None
+        self.questions = None
+        self.bot_state = None
+        self.user_stats = None
+        self.quiz_stats = None
+        self.leaderboards = None
+        self._leaderboard_task = None
+        self._reaper_task = None
+        self._reaper_wakeup = asyncio.Event()
+        self.reaped_results = 0
+        self._pending_results = []
+        self._flush_lock = asyncio.Lock()
+        self.quiz_cache = TTLCache(Config.QUIZ_CACHE_SIZE, Config.QUIZ_CACHE_TTL)
+        self.question_cache = TTLCache(Config.QUESTION_CACHE_SIZE, Config.QUIZ_CACHE_TTL)
+        self._quiz_loads = {}
+        # Only positive answers are cached: an attempt can't be undone, but a miss may turn into one
+        self.attempt_cache = TTLCache(Config.ATTEMPT_CACHE_SIZE, Config.ATTEMPT_CACHE_TTL)
+        self.command_latency = CommandLatencyListener()
+        self.ping_latency = Histogram()
+        self.degraded = False
+        self.dropped_results = 0
+        self._health_task = None
+    
+    @staticmethod
+    def _results_write_concern() -> WriteConcern:
+        w = Config.MONGO_RESULTS_W
+        return WriteConcern(w=int(w) if w.isdigit() else w, j=Config.MONGO_RESULTS_JOURNAL)
     
     async def connect(self):
         try:
-            self.client = AsyncIOMotorClient(Config.MONGO_URL)
+            self.client = AsyncIOMotorClient(
+                Config.MONGO_URL,
+                maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+                minPoolSize=Config.MONGO_MIN_POOL_SIZE,
+                serverSelectionTimeoutMS=Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                connectTimeoutMS=Config.MONGO_CONNECT_TIMEOUT_MS,
+                socketTimeoutMS=Config.MONGO_SOCKET_TIMEOUT_MS,
+                retryWrites=Config.MONGO_RETRY_WRITES,
+                event_listeners=[self.command_latency]
+            )
             self.db = self.client.quiz_bot
             self.quizzes = self.db.quizzes
-            self.results = self.db.results
+            self.results = self.db.get_collection("results", write_concern=self._results_write_concern())
+            self.quiz_runs = self.db.quiz_runs
+            self.questions = self.db.questions
+            self.bot_state = self.db.bot_state
+            self.user_stats = self.db.user_stats
+            self.quiz_stats = self.db.quiz_stats
+            self.leaderboards = self.db.leaderboards
             
             await self.client.admin.command('ping')
             logger.info("Connected to MongoDB successfully!")
             
+            await self.ensure_indexes()
+            
+            if Config.CHECK_QUERY_PLANS:
+                await self.check_query_plans()
+            
         except Exception as e:
             logger.error(f"MongoDB connection error: {e}")
             raise
     
-    async def create_quiz(self, creator_id: int, name: str, questions: list, time_per_question: int) -> str:
-        quiz_id = str(uuid.uuid4())[:8]
+    def start_health_check(self):
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+    
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(Config.MONGO_HEALTH_INTERVAL)
+            await self.check_health()
+    
+    async def check_health(self) -> bool:
+        started = time.monotonic()
         
-        quiz_doc = {
-            "quiz_id": quiz_id,
+        try:
+            await self.client.admin.command('ping')
+            latency_ms = (time.monotonic() - started) * 1000
+            self.ping_latency.observe(latency_ms)
+            healthy = latency_ms <= Config.MONGO_SLOW_MS
+        except Exception as e:
+            logger.warning(f"MongoDB health check failed: {e}")
+            healthy = False
+        
+        if healthy == self.degraded:
+            self.degraded = not healthy
+            if self.degraded:
+                logger.warning("MongoDB is slow or unreachable; buffering results in memory")
+            else:
+                logger.info(f"MongoDB recovered; flushing {len(self._pending_results)} buffered results")
+        
+        if not self.degraded and self._pending_results:
+            try:
+                await self.flush_results()
+            except Exception as e:
+                logger.error(f"Error flushing buffered results: {e}")
+        
+        return healthy
+    
+    def stats(self) -> dict:
+        return {
+            "degraded": self.degraded,
+            "pending_results": len(self._pending_results),
+            "dropped_results": self.dropped_results,
+            "reaped_results": self.reaped_results,
+            "ping_ms": self.ping_latency.summary(),
+            "commands_ms": self.command_latency.stats(),
+            "quiz_cache": self.quiz_cache.stats(),
+            "question_cache": self.question_cache.stats(),
+            "attempt_cache": self.attempt_cache.stats()
+        }
+    
+    async def ensure_indexes(self):
+        indexes = [
+            (self.quizzes, [("quiz_id", ASCENDING)], {"unique": True}),
+            (self.quizzes, [("content_hash", ASCENDING)], {"unique": True, "sparse": True}),
+            (self.quizzes, [("deleted_at", ASCENDING)], {"sparse": True}),
+            (self.results, [("quiz_id", ASCENDING), ("user_id", ASCENDING)], {}),
+            (self.results, [("completed_at", DESCENDING)], {}),
+            (self.results, [("stored_at", DESCENDING)], {"sparse": True}),
+            *((self.db[name], keys, options) for name, specs in STATS_INDEXES.items() for keys, options in specs),
+            (self.bot_state, [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+        ]
+        
+        for collection, keys, options in indexes:
+            try:
+                name = await collection.create_index(keys, **options)
+                logger.info(f"Index ready: {collection.name}.{name}")
+            except Exception as e:
+                logger.error(f"Failed to create index on {collection.name} {keys}: {e}")
+    
+    def _hot_queries(self):
+        return [
+            ("get_quiz", self.quizzes, {"quiz_id": "", "deleted_at": {"$exists": False}}, None),
+            ("has_user_attempted", self.results, {"quiz_id": "", "user_id": 0}, None),
+            ("delete_quiz", self.results, {"quiz_id": ""}, None),
+            ("leaderboard_window", self.results, {"completed_at": {"$gte": datetime.utcnow()}}, None),
+        ]
+    
+    @staticmethod
+    def _plan_stages(plan: dict) -> set:
+        stages = set()
+        pending = [plan]
+        
+        while pending:
+            stage = pending.pop()
+            if "stage" in stage:
+                stages.add(stage["stage"])
+            if "queryPlan" in stage:
+                pending.append(stage["queryPlan"])
+            if "inputStage" in stage:
+                pending.append(stage["inputStage"])
+            pending.extend(stage.get("inputStages", []))
+        
+        return stages
+    
+    async def check_query_plans(self):
+        for name, collection, query, sort in self._hot_queries():
+            try:
+                cursor = collection.find(query)
+                if sort:
+                    cursor = cursor.sort(sort)
+                
+                explain = await cursor.explain()
+                stages = self._plan_stages(explain["queryPlanner"]["winningPlan"])
+            except Exception as e:
+                logger.warning(f"Could not explain query {name}: {e}")
+                continue
+            
+            if "COLLSCAN" in stages:
+                logger.warning(f"Query {name} on {collection.name} is not backed by an index (COLLSCAN)")
+            elif sort and "SORT" in stages:
+                logger.warning(f"Query {name} on {collection.name} sorts in memory")
+            else:
+                logger.info(f"Query {name} on {collection.name} uses an index")
+    
+    @staticmethod
+    def _new_quiz_id() -> str:
+        return str(uuid.uuid4())[:8]
+    
+    @staticmethod
+    def _quiz_id_taken(error: dict) -> bool:
+        # Short ids keep /startquiz easy to type, so they can collide and are drawn again
+        if error.get("code") != 11000:
+            return False
+        return "quiz_id" in (error.get("keyPattern") or {}) or "quiz_id_1" in error.get("errmsg", "")
+    
+    def _quiz_doc(self, creator_id: int, name: str, question_ids: list, time_per_question: int) -> dict:
+        return {
+            "quiz_id": self._new_quiz_id(),
             "creator_id": creator_id,
             "name": name,
-            "questions": questions,
+            "question_ids": question_ids,
             "time_per_question": time_per_question,
             "created_at": datetime.utcnow()
         }
+    
+    async def store_questions(self, questions: list) -> list:
+        question_ids = []
+        requests = {}
+        
+        for question in questions:
+            # Whitespace-only differences share one document, but the text is kept as written
+            doc = question_doc(question)
+            question_id = question_hash(normalize_question(doc))
+            question_ids.append(question_id)
+            
+            if question_id not in requests:
+                requests[question_id] = UpdateOne({"_id": question_id}, {"$setOnInsert": doc}, upsert=True)
+                self.question_cache.put(question_id, MappingProxyType(doc))
+        
+        requests = list(requests.values())
+        
+        for start in range(0, len(requests), Config.RESULT_BATCH_SIZE):
+            try:
+                await self.questions.bulk_write(requests[start:start + Config.RESULT_BATCH_SIZE], ordered=False)
+            except BulkWriteError as e:
+                # Concurrent upserts of the same question can race on _id; the
+                # question exists either way, so only other errors matter
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+        
+        return question_ids
+    
+    async def _resolve_questions(self, question_ids: list) -> list:
+        resolved = {}
+        missing = []
+        
+        for question_id in set(question_ids):
+            question = self.question_cache.get(question_id)
+            if question is None:
+                missing.append(question_id)
+            else:
+                resolved[question_id] = question
+        
+        if missing:
+            async for doc in self.questions.find({"_id": {"$in": missing}}):
+                question_id = doc.pop("_id")
+                question = MappingProxyType(doc)
+                self.question_cache.put(question_id, question)
+                resolved[question_id] = question
         
-        await self.quizzes.insert_one(quiz_doc)
+        questions = []
+        
+        for question_id in question_ids:
+            if question_id in resolved:
+                questions.append(resolved[question_id])
+            else:
+                logger.error(f"Question {question_id} is referenced but missing")
+        
+        return questions
+    
+    async def create_quiz(self, creator_id: int, name: str, questions: list, time_per_question: int) -> str:
+        question_ids = await self.store_questions(questions)
+        quiz_doc = self._quiz_doc(creator_id, name, question_ids, time_per_question)
+        
+        for attempt in range(QUIZ_ID_ATTEMPTS):
+            try:
+                await self.quizzes.insert_one(quiz_doc)
+                break
+            except DuplicateKeyError as e:
+                if not self._quiz_id_taken(e.details or {}) or attempt + 1 == QUIZ_ID_ATTEMPTS:
+                    raise
+                quiz_doc["quiz_id"] = self._new_quiz_id()
+        
+        quiz_id = quiz_doc["quiz_id"]
+        self.quiz_cache.put(quiz_id, self._freeze_quiz(quiz_doc, questions))
         logger.info(f"Quiz created: {quiz_id}")
         return quiz_id
     
-    async def get_quiz(self, quiz_id: str):
-        quiz = await self.quizzes.find_one({"quiz_id": quiz_id})
+    async def import_quizzes(self, creator_id: int, entries: list) -> list:
+        report = []
+        pending = {}
+        
+        for entry in entries:
+            if entry["errors"]:
+                report.append({"name": entry["name"], "status": "invalid", "error": entry["errors"][0]})
+                continue
+            
+            content_hash = quiz_content_hash(
+                creator_id, entry["name"], entry["questions"], entry["time_per_question"]
+            )
+            item = {"name": entry["name"], "status": "pending", "content_hash": content_hash}
+            report.append(item)
+            
+            if content_hash in pending:
+                item["status"] = "duplicate"
+                continue
+            
+            quiz_doc = self._quiz_doc(creator_id, entry["name"], None, entry["time_per_question"])
+            quiz_doc["content_hash"] = content_hash
+            item["quiz_id"] = quiz_doc["quiz_id"]
+            pending[content_hash] = (quiz_doc, item, entry["questions"])
+        
+        batch = list(pending.values())
+        
+        for start in range(0, len(batch), Config.IMPORT_BATCH_SIZE):
+            await self._import_chunk(batch[start:start + Config.IMPORT_BATCH_SIZE])
+        
+        for item in report:
+            if item.get("status") == "duplicate" and item.get("content_hash") in pending:
+                item["quiz_id"] = pending[item["content_hash"]][1].get("quiz_id")
+            item.pop("content_hash", None)
+        
+        created = sum(1 for item in report if item["status"] == "created")
+        logger.info(f"Imported {created}/{len(report)} quizzes for creator {creator_id}")
+        return report
+    
+    async def _import_chunk(self, chunk: list):
+        hashes = [quiz_doc["content_hash"] for quiz_doc, _, _ in chunk]
+        existing = {}
+        
+        async for doc in self.quizzes.find({"content_hash": {"$in": hashes}}, {"quiz_id": 1, "content_hash": 1}):
+            existing[doc["content_hash"]] = doc["quiz_id"]
+        
+        to_insert = []
+        
+        for quiz_doc, item, questions in chunk:
+            if quiz_doc["content_hash"] in existing:
+                item["status"] = "duplicate"
+                item["quiz_id"] = existing[quiz_doc["content_hash"]]
+            else:
+                to_insert.append((quiz_doc, item, questions))
+        
+        if not to_insert:
+            return
+        
+        question_ids = await self.store_questions([q for _, _, questions in to_insert for q in questions])
+        offset = 0
+        
+        for quiz_doc, _, questions in to_insert:
+            quiz_doc["question_ids"] = question_ids[offset:offset + len(questions)]
+            offset += len(questions)
+        
+        for attempt in range(QUIZ_ID_ATTEMPTS):
+            failed = {}
+            retry = []
+            
+            try:
+                await self.quizzes.insert_many([quiz_doc for quiz_doc, _, _ in to_insert], ordered=False)
+            except BulkWriteError as e:
+                failed = {error["index"]: error for error in e.details.get("writeErrors", [])}
+            
+            for index, (quiz_doc, item, questions) in enumerate(to_insert):
+                error = failed.get(index)
+                
+                if error is None:
+                    item["status"] = "created"
+                    self.quiz_cache.put(quiz_doc["quiz_id"], self._freeze_quiz(quiz_doc, questions))
+                elif self._quiz_id_taken(error) and attempt + 1 < QUIZ_ID_ATTEMPTS:
+                    quiz_doc["quiz_id"] = item["quiz_id"] = self._new_quiz_id()
+                    retry.append((quiz_doc, item, questions))
+                elif error.get("code") == 11000 and "content_hash" in error.get("errmsg", ""):
+                    # A concurrent import of the same content won the race
+                    item["status"] = "duplicate"
+                    existing_doc = await self.quizzes.find_one({"content_hash": quiz_doc["content_hash"]}, {"quiz_id": 1})
+                    item["quiz_id"] = existing_doc["quiz_id"] if existing_doc else None
+                else:
+                    item["status"] = "failed"
+                    item["error"] = error.get("errmsg", "insert failed")
+                    item.pop("quiz_id", None)
+            
+            if not retry:
+                return
+            to_insert = retry
+    
+    async def migrate_embedded_questions(self, batch_size: int = 100) -> int:
+        migrated = 0
+        cursor = self.quizzes.find(
+            {"questions": {"$exists": True}, "question_ids": {"$exists": False}},
+            {"_id": 1, "quiz_id": 1, "questions": 1}
+        ).batch_size(batch_size)
+        batch = []
+        
+        async for quiz in cursor:
+            batch.append(quiz)
+            
+            if len(batch) >= batch_size:
+                migrated += await self._migrate_batch(batch)
+                batch = []
+        
+        if batch:
+            migrated += await self._migrate_batch(batch)
+        
+        logger.info(f"Migrated {migrated} quizzes to question references")
+        return migrated
+    
+    async def _migrate_batch(self, quizzes: list) -> int:
+        question_ids = await self.store_questions([q for quiz in quizzes for q in quiz["questions"]])
+        requests = []
+        offset = 0
+        
+        for quiz in quizzes:
+            ids = question_ids[offset:offset + len(quiz["questions"])]
+            offset += len(quiz["questions"])
+            requests.append(UpdateOne(
+                {"_id": quiz["_id"]},
+                {"$set": {"question_ids": ids}, "$unset": {"questions": ""}}
+            ))
+            self.quiz_cache.invalidate(quiz["quiz_id"])
+        
+        await self.quizzes.bulk_write(requests, ordered=False)
+        return len(requests)
+    
+    @staticmethod
+    def _freeze_quiz(quiz: dict, questions: list):
+        # Cached quizzes are shared between every chat running them, so hand
+        # out read-only views instead of dicts a caller could mutate
+        frozen = dict(quiz)
+        frozen["questions"] = tuple(q if isinstance(q, MappingProxyType) else MappingProxyType(dict(q)) for q in questions)
+        return MappingProxyType(frozen)
+    
+    async def _load_quiz(self, quiz_id: str):
+        quiz = await self.quizzes.find_one({"quiz_id": quiz_id, "deleted_at": {"$exists": False}})
+        if quiz is None:
+            return None
+        
+        if "question_ids" in quiz:
+            questions = await self._resolve_questions(quiz["question_ids"])
+        else:
+            questions = quiz["questions"]
+        
+        quiz = self._freeze_quiz(quiz, questions)
+        self.quiz_cache.put(quiz_id, quiz)
         return quiz
     
+    async def get_quiz(self, quiz_id: str):
+        quiz = self.quiz_cache.get(quiz_id)
+        if quiz is not None:
+            return quiz
+        
+        if quiz_id not in self._quiz_loads:
+            load = asyncio.ensure_future(self._load_quiz(quiz_id))
+            self._quiz_loads[quiz_id] = load
+            load.add_done_callback(lambda _: self._quiz_loads.pop(quiz_id, None))
+        
+        return await asyncio.shield(self._quiz_loads[quiz_id])
+    
     async def delete_quiz(self, quiz_id: str) -> bool:
-        result = await self.quizzes.delete_one({"quiz_id": quiz_id})
+        # Tombstone now and leave the results to the reaper; dropping content_hash
+        # lets the same content be imported again as a new quiz
+        result = await self.quizzes.update_one(
+            {"quiz_id": quiz_id, "deleted_at": {"$exists": False}},
+            {"$set": {"deleted_at": datetime.utcnow()}, "$unset": {"content_hash": ""}}
+        )
+        self.quiz_cache.invalidate(quiz_id)
         
-        if result.deleted_count > 0:
-            await self.results.delete_many({"quiz_id": quiz_id})
-            logger.info(f"Quiz deleted: {quiz_id}")
+        if result.modified_count > 0:
+            logger.info(f"Quiz tombstoned: {quiz_id}")
+            self._reaper_wakeup.set()
             return True
         
         return False
     
-    async def save_result(self, quiz_id: str, chat_id: int, user_id: int, first_name: str, 
-                         correct: int, wrong: int, total: int, accuracy: float):
-        result_doc = {
+    def start_reaper(self):
+        if self._reaper_task is None:
+            self._reaper_task = asyncio.create_task(self._reaper_loop())
+    
+    async def _reaper_loop(self):
+        while True:
+            self._reaper_wakeup.clear()
+            
+            try:
+                # Listed up front so a long reap can't outlive the cursor
+                tombstones = await self.quizzes.find({"deleted_at": {"$exists": True}}, {"quiz_id": 1}).to_list(length=None)
+                
+                for quiz in tombstones:
+                    await self.reap_quiz(quiz["quiz_id"])
+            except Exception as e:
+                logger.error(f"Error reaping deleted quizzes: {e}")
+            
+            try:
+                await asyncio.wait_for(self._reaper_wakeup.wait(), Config.REAPER_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def reap_quiz(self, quiz_id: str) -> int:
+        remaining = await self.results.count_documents({"quiz_id": quiz_id})
+        reaped = 0
+        
+        while True:
+            cursor = self.results.find({"quiz_id": quiz_id}, {"_id": 1}).limit(Config.REAPER_BATCH_SIZE)
+            ids = [doc["_id"] async for doc in cursor]
+            
+            if not ids:
+                break
+            
+            result = await self.results.delete_many({"_id": {"$in": ids}})
+            reaped += result.deleted_count
+            self.reaped_results += result.deleted_count
+            logger.info(f"Reaping quiz {quiz_id}: {reaped}/{remaining} results deleted")
+            
+            # Spread the deletes out so a huge quiz can't saturate the primary
+            await asyncio.sleep(Config.REAPER_PAUSE)
+        
+        # A flush that saw the quiz live just before the tombstone can still land rows,
+        # so keep the tombstone until no insert can be in flight and nothing is left
+        tombstone = await self.quizzes.find_one(
+            {"quiz_id": quiz_id, "deleted_at": {"$exists": True}}, {"deleted_at": 1}
+        )
+        if tombstone is None:
+            return reaped
+        
+        if (tombstone["deleted_at"] > datetime.utcnow() - self._insert_window()
+                or await self.results.count_documents({"quiz_id": quiz_id}, limit=1)):
+            logger.info(f"Reaping quiz {quiz_id}: keeping its tombstone for another pass")
+            return reaped
+        
+        await self.quiz_stats.delete_one({"_id": quiz_id})
+        await self.leaderboards.delete_one({"_id": f"quiz:{quiz_id}"})
+        await self.quizzes.delete_one({"quiz_id": quiz_id, "deleted_at": {"$exists": True}})
+        logger.info(f"Quiz deleted: {quiz_id} ({reaped} results removed)")
+        return reaped
+    
+    def _result_doc(self, quiz_id: str, chat_id: int, user_id: int, first_name: str,
+                    correct: int, wrong: int, total: int, accuracy: float) -> dict:
+        return {
             "quiz_id": quiz_id,
             "chat_id": chat_id,
             "user_id": user_id,
@@ -71,18 +555,284 @@ class Database:
             "accuracy": accuracy,
             "completed_at": datetime.utcnow()
         }
+    
+    async def save_results(self, result_docs: list) -> int:
+        saved = 0
+        
+        for start in range(0, len(result_docs), Config.RESULT_BATCH_SIZE):
+            chunk = result_docs[start:start + Config.RESULT_BATCH_SIZE]
+            stored_at = datetime.utcnow()
+            
+            for doc in chunk:
+                doc["stored_at"] = stored_at
+            
+            try:
+                result = await self.results.insert_many(chunk, ordered=False)
+                saved += len(result.inserted_ids)
+            except BulkWriteError as e:
+                # Rows re-queued after a partial flush already exist; anything else is a real failure
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+                saved += e.details.get("nInserted", 0)
+        
+        return saved
+    
+    async def apply_stats(self, result_docs: list, user_stats=None, quiz_stats=None):
+        user_stats = user_stats if user_stats is not None else self.user_stats
+        quiz_stats = quiz_stats if quiz_stats is not None else self.quiz_stats
+        user_requests = []
+        quizzes = {}
+        
+        for doc in result_docs:
+            user_requests.append(UpdateOne(
+                {"_id": doc["user_id"]},
+                {
+                    "$inc": {"attempts": 1, "correct": doc["correct"], "wrong": doc["wrong"], "questions": doc["total"]},
+                    "$set": {"first_name": doc["first_name"]},
+                    "$max": {"last_played": doc["completed_at"]}
+                },
+                upsert=True
+            ))
+            
+            totals = quizzes.setdefault(doc["quiz_id"], {
+                "attempts": 0, "correct": 0, "wrong": 0, "questions": 0, "best_correct": 0,
+                "last_played": doc["completed_at"]
+            })
+            totals["attempts"] += 1
+            totals["correct"] += doc["correct"]
+            totals["wrong"] += doc["wrong"]
+            totals["questions"] += doc["total"]
+            totals["best_correct"] = max(totals["best_correct"], doc["correct"])
+            totals["last_played"] = max(totals["last_played"], doc["completed_at"])
         
-        await self.results.insert_one(result_doc)
-        logger.info(f"Result saved for user {user_id} in quiz {quiz_id}")
+        quiz_requests = [
+            UpdateOne(
+                {"_id": quiz_id},
+                {
+                    "$inc": {field: totals[field] for field in ("attempts", "correct", "wrong", "questions")},
+                    "$max": {"best_correct": totals["best_correct"], "last_played": totals["last_played"]}
+                },
+                upsert=True
+            )
+            for quiz_id, totals in quizzes.items()
+        ]
+        
+        for collection, requests in ((user_stats, user_requests), (quiz_stats, quiz_requests)):
+            for start in range(0, len(requests), Config.RESULT_BATCH_SIZE):
+                await collection.bulk_write(requests[start:start + Config.RESULT_BATCH_SIZE], ordered=False)
+    
+    async def rebuild_stats(self, batch_size: int = 1000) -> int:
+        user_stats = self.db.user_stats_rebuild
+        quiz_stats = self.db.quiz_stats_rebuild
+        await user_stats.drop()
+        await quiz_stats.drop()
+        
+        projection = {"_id": 0, "quiz_id": 1, "user_id": 1, "first_name": 1,
+                      "correct": 1, "wrong": 1, "total": 1, "completed_at": 1}
+        cursor = self.results.find({}, projection).batch_size(batch_size)
+        processed = 0
+        chunk = []
+        
+        async for doc in cursor:
+            chunk.append(doc)
+            
+            if len(chunk) >= batch_size:
+                await self.apply_stats(chunk, user_stats, quiz_stats)
+                processed += len(chunk)
+                chunk = []
+                logger.info(f"Rebuilt stats from {processed} results")
+        
+        if chunk:
+            await self.apply_stats(chunk, user_stats, quiz_stats)
+            processed += len(chunk)
+        
+        # Swap the rebuilt collections in so readers never see a half-built state. Renaming
+        # with dropTarget discards the target's indexes, so the copies get them first
+        for rebuilt, target in ((user_stats, "user_stats"), (quiz_stats, "quiz_stats")):
+            if processed:
+                for keys, options in STATS_INDEXES[target]:
+                    await rebuilt.create_index(keys, **options)
+                await rebuilt.rename(target, dropTarget=True)
+            else:
+                await self.db[target].delete_many({})
+        
+        return processed
+    
+    @staticmethod
+    def _leaderboard_pipeline(match: dict, limit: int, best_only: bool = False) -> list:
+        accumulate = "$max" if best_only else "$sum"
+        
+        return [
+            {"$match": match},
+            {"$group": {
+                "_id": "$user_id",
+                "first_name": {"$last": "$first_name"},
+                "correct": {accumulate: "$correct"},
+                "questions": {accumulate: "$total"},
+                "attempts": {"$sum": 1}
+            }},
+            {"$sort": {"correct": -1, "questions": 1}},
+            {"$limit": limit},
+            {"$project": {"_id": 0, "user_id": "$_id", "first_name": 1, "correct": 1, "questions": 1, "attempts": 1}}
+        ]
+    
+    @staticmethod
+    def _insert_window() -> timedelta:
+        # Longest an insert stamped with stored_at can take to land, including one retry
+        return timedelta(
+            milliseconds=2 * (Config.MONGO_SERVER_SELECTION_TIMEOUT_MS + Config.MONGO_SOCKET_TIMEOUT_MS)
+        )
+    
+    async def _save_leaderboard(self, scope: str, entries: list, generated_at: datetime):
+        await self.leaderboards.replace_one(
+            {"_id": scope}, {"entries": entries, "generated_at": generated_at}, upsert=True
+        )
+    
+    async def refresh_leaderboards(self):
+        limit = Config.TOP_LEADERBOARD_SIZE
+        now = datetime.utcnow()
+        
+        previous = await self.leaderboards.find_one({"_id": "global"}, {"generated_at": 1})
+        
+        # Only quizzes with rows stored since the last refresh need a new snapshot. Rows
+        # can be held back for a long time after completing, so go by when they were
+        # stored, and look back far enough to cover inserts still in flight last time
+        if previous:
+            since = previous["generated_at"] - self._insert_window()
+            quiz_ids = await self.results.distinct("quiz_id", {"stored_at": {"$gte": since}})
+        else:
+            quiz_ids = await self.results.distinct("quiz_id")
+        
+        for quiz_id in quiz_ids:
+            pipeline = self._leaderboard_pipeline({"quiz_id": quiz_id}, limit, best_only=True)
+            await self._save_leaderboard(
+                f"quiz:{quiz_id}", await self.results.aggregate(pipeline).to_list(length=limit), now
+            )
+        
+        for scope, window in LEADERBOARD_WINDOWS.items():
+            pipeline = self._leaderboard_pipeline({"completed_at": {"$gte": now - window}}, limit)
+            await self._save_leaderboard(scope, await self.results.aggregate(pipeline).to_list(length=limit), now)
+        
+        # The global snapshot is written last; its timestamp marks how far quiz snapshots are current
+        cursor = self.user_stats.find(
+            {}, {"first_name": 1, "correct": 1, "questions": 1, "attempts": 1}
+        ).sort("correct", DESCENDING).limit(limit)
+        entries = [
+            {"user_id": doc.pop("_id"), **doc}
+            for doc in await cursor.to_list(length=limit)
+        ]
+        await self._save_leaderboard("global", entries, now)
+        
+        logger.info(f"Refreshed global, daily and weekly leaderboards and {len(quiz_ids)} quiz leaderboards")
+    
+    def start_leaderboard_refresh(self):
+        if self._leaderboard_task is None:
+            self._leaderboard_task = asyncio.create_task(self._leaderboard_loop())
+    
+    async def _leaderboard_loop(self):
+        while True:
+            try:
+                await self.refresh_leaderboards()
+            except Exception as e:
+                logger.error(f"Error refreshing leaderboards: {e}")
+            
+            await asyncio.sleep(Config.LEADERBOARD_REFRESH_INTERVAL)
+    
+    async def get_leaderboard_snapshot(self, scope: str):
+        return await self.leaderboards.find_one({"_id": scope})
+    
+    async def get_user_stats(self, user_id: int):
+        return await self.user_stats.find_one({"_id": user_id})
+    
+    async def get_quiz_stats(self, quiz_id: str):
+        return await self.quiz_stats.find_one({"_id": quiz_id})
+    
+    def queue_result(self, quiz_id: str, chat_id: int, user_id: int, first_name: str,
+                     correct: int, wrong: int, total: int, accuracy: float):
+        self._pending_results.append(
+            self._result_doc(quiz_id, chat_id, user_id, first_name, correct, wrong, total, accuracy)
+        )
+        self.attempt_cache.put((quiz_id, user_id), True)
+        
+        overflow = len(self._pending_results) - Config.RESULT_BUFFER_LIMIT
+        if overflow > 0:
+            del self._pending_results[:overflow]
+            self.dropped_results += overflow
+            logger.error(f"Result buffer full; dropped {overflow} oldest results")
+    
+    async def _live_results(self, result_docs: list) -> list:
+        # Rows queued or held back for a quiz that has since been deleted would outlive the reaper
+        quiz_ids = list({doc["quiz_id"] for doc in result_docs})
+        live = set(await self.quizzes.distinct(
+            "quiz_id", {"quiz_id": {"$in": quiz_ids}, "deleted_at": {"$exists": False}}
+        ))
+        rows = [doc for doc in result_docs if doc["quiz_id"] in live]
+        
+        if len(rows) < len(result_docs):
+            logger.info(f"Dropped {len(result_docs) - len(rows)} results for deleted quizzes")
+        
+        return rows
+    
+    async def flush_results(self) -> int:
+        async with self._flush_lock:
+            if not self._pending_results:
+                return 0
+            
+            if self.degraded:
+                # The health check flushes once MongoDB recovers
+                logger.warning(f"MongoDB degraded; holding {len(self._pending_results)} results")
+                return 0
+            
+            pending, self._pending_results = self._pending_results, []
+            
+            try:
+                rows = await self._live_results(pending)
+                saved = await self.save_results(rows)
+            except BaseException:
+                # Also on cancellation, which /cancelquiz and /deletequiz deliver mid-flush.
+                # insert_many stamps an _id on every doc, so re-queued rows that
+                # did make it in are rejected as duplicates on the next flush
+                self._pending_results[:0] = pending
+                raise
+            
+            logger.info(f"Flushed {saved} results")
+            
+            try:
+                await self.apply_stats(rows)
+            except Exception as e:
+                logger.error(f"Error updating stats for {len(rows)} results, run `python cli.py rebuild-stats`: {e}")
+            
+            return saved
     
     async def has_user_attempted(self, quiz_id: str, user_id: int) -> bool:
-        result = await self.results.find_one({"quiz_id": quiz_id, "user_id": user_id})
-        return result is not None
+        if self.attempt_cache.get((quiz_id, user_id)):
+            return True
+        
+        result = await self.results.find_one({"quiz_id": quiz_id, "user_id": user_id}, {"_id": 1})
+        
+        if result is None:
+            return False
+        
+        self.attempt_cache.put((quiz_id, user_id), True)
+        return True
+    
+    def iter_results(self, quiz_id: str, fields: tuple, batch_size: int = 1000):
+        projection = {"_id": 0, **{field: 1 for field in fields}}
+        return self.results.find({"quiz_id": quiz_id}, projection).batch_size(batch_size)
     
-    async def get_quiz_results(self, quiz_id: str, chat_id: int):
-        cursor = self.results.find({"quiz_id": quiz_id, "chat_id": chat_id})
-        results = await cursor.to_list(length=None)
+    async def save_run_checkpoints(self, checkpoints: list):
+        if not checkpoints:
+            return
         
-        results.sort(key=lambda x: (x["correct"], x["accuracy"]), reverse=True)
+        requests = [
+            UpdateOne({"_id": chat_id}, {"$set": fields}, upsert=True)
+            for chat_id, fields in checkpoints
+        ]
         
-        return results
+        await self.quiz_runs.bulk_write(requests, ordered=False)
+    
+    async def get_runs(self) -> list:
+        return await self.quiz_runs.find({}).to_list(length=None)
+    
+    async def delete_run(self, chat_id: int):
+        await self.quiz_runs.delete_one({"_id": chat_id})
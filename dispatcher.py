@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import itertools
+import time
+import logging
+from pyrogram.errors import FloodWait
+from config import Config
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_POLL = 0
+PRIORITY_MESSAGE = 1
+PRIORITY_LEADERBOARD = 2
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until")
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, now: float) -> float:
+        if self.blocked_until > now:
+            return self.blocked_until - now
+        
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+    
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+    
+    def is_idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity and self.blocked_until <= now
+
+
+class _SendJob:
+    __slots__ = ("method", "chat_id", "priority", "kwargs", "future", "enqueued_at", "attempts")
+    
+    def __init__(self, method: str, chat_id: int, priority: int, kwargs: dict, future: asyncio.Future):
+        self.method = method
+        self.chat_id = chat_id
+        self.priority = priority
+        self.kwargs = kwargs
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+
+class SendDispatcher:
+    def __init__(self, app):
+        self.app = app
+        self.global_bucket = TokenBucket(Config.SEND_GLOBAL_RATE, Config.SEND_GLOBAL_RATE)
+        self.chat_buckets = {}
+        self._ready = []
+        self._delayed = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(Config.SEND_CONCURRENCY)
+        self._task = None
+        self.latency = {}
+        self.queue_wait = Histogram()
+        self.flood_waits = 0
+        self.failures = 0
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def submit(self, method: str, chat_id: int, priority: int, **kwargs) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        job = _SendJob(method, chat_id, priority, kwargs, future)
+        
+        heapq.heappush(self._ready, (priority, next(self._seq), job))
+        self._wakeup.set()
+        return future
+    
+    async def send_poll(self, chat_id: int, priority: int = PRIORITY_POLL, **kwargs):
+        return await self.submit("send_poll", chat_id, priority, **kwargs)
+    
+    async def send_message(self, chat_id: int, text: str, priority: int = PRIORITY_MESSAGE, **kwargs):
+        return await self.submit("send_message", chat_id, priority, text=text, **kwargs)
+    
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        
+        if bucket is None:
+            # Telegram allows roughly one message per second in private chats
+            # and 20 per minute in groups
+            if chat_id < 0:
+                bucket = TokenBucket(Config.SEND_GROUP_RATE / 60, Config.SEND_GROUP_BURST)
+            else:
+                bucket = TokenBucket(Config.SEND_PRIVATE_RATE, Config.SEND_PRIVATE_RATE)
+            self.chat_buckets[chat_id] = bucket
+        
+        return bucket
+    
+    def _prune_buckets(self, now: float):
+        if len(self.chat_buckets) < Config.SEND_BUCKET_LIMIT:
+            return
+        
+        for chat_id in [c for c, b in self.chat_buckets.items() if b.is_idle(now)]:
+            del self.chat_buckets[chat_id]
+    
+    def _delay(self, job: _SendJob, until: float):
+        heapq.heappush(self._delayed, (until, next(self._seq), job))
+    
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            
+            while self._delayed and self._delayed[0][0] <= now:
+                _, seq, job = heapq.heappop(self._delayed)
+                heapq.heappush(self._ready, (job.priority, seq, job))
+            
+            if not self._ready:
+                self._wakeup.clear()
+                timeout = (self._delayed[0][0] - now) if self._delayed else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            _, _, job = heapq.heappop(self._ready)
+            
+            if job.future.done():
+                continue
+            
+            chat_bucket = self._chat_bucket(job.chat_id)
+            chat_wait = chat_bucket.wait_time(now)
+            if chat_wait > 0:
+                self._delay(job, now + chat_wait)
+                continue
+            
+            global_wait = self.global_bucket.wait_time(now)
+            if global_wait > 0:
+                heapq.heappush(self._ready, (job.priority, next(self._seq), job))
+                await asyncio.sleep(global_wait)
+                continue
+            
+            await self._slots.acquire()
+            
+            now = time.monotonic()
+            chat_bucket.consume(now)
+            self.global_bucket.consume(now)
+            self._prune_buckets(now)
+            
+            asyncio.create_task(self._send(job))
+    
+    async def _send(self, job: _SendJob):
+        started = time.monotonic()
+        self.queue_wait.observe((started - job.enqueued_at) * 1000)
+        job.attempts += 1
+        
+        try:
+            result = await getattr(self.app, job.method)(chat_id=job.chat_id, **job.kwargs)
+        except FloodWait as e:
+            self.flood_waits += 1
+            wait = float(e.value)
+            logger.warning(f"FloodWait of {wait}s on {job.method} to chat {job.chat_id}")
+            
+            if job.attempts >= Config.SEND_MAX_ATTEMPTS:
+                self.failures += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+                return
+            
+            until = time.monotonic() + wait
+            bucket = self._chat_bucket(job.chat_id)
+            bucket.blocked_until = max(bucket.blocked_until, until)
+            self._delay(job, until)
+            self._wakeup.set()
+            return
+        except Exception as e:
+            self.failures += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        
+        self.latency.setdefault(job.method, Histogram()).observe((time.monotonic() - started) * 1000)
+        
+        if not job.future.done():
+            job.future.set_result(result)
+    
+    def stats(self) -> dict:
+        return {
+            "ready": len(self._ready),
+            "delayed": len(self._delayed),
+            "chat_buckets": len(self.chat_buckets),
+            "flood_waits": self.flood_waits,
+            "failures": self.failures,
+            "queue_wait_ms": self.queue_wait.summary(),
+            "latency_ms": {method: hist.summary() for method, hist in self.latency.items()}
+        }
@@ -0,0 +1,33 @@
+import csv
+import json
+from datetime import datetime
+
+EXPORT_FIELDS = ("chat_id", "user_id", "first_name", "correct", "wrong", "total", "accuracy", "completed_at")
+EXPORT_FORMATS = ("csv", "ndjson")
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def write_results(rows, file_format: str, out) -> int:
+    written = 0
+    
+    if file_format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(EXPORT_FIELDS)
+        
+        async for row in rows:
+            writer.writerow([_cell(row.get(field)) for field in EXPORT_FIELDS])
+            written += 1
+    elif file_format == "ndjson":
+        async for row in rows:
+            out.write(json.dumps({field: _cell(row.get(field)) for field in EXPORT_FIELDS}, ensure_ascii=False))
+            out.write("\n")
+            written += 1
+    else:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    
+    return written
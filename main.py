@@ -1,11 +1,21 @@
 import asyncio
+import os
+import tempfile
+import time
 from pyrogram import Client, filters
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton, Message
-from pyrogram.enums import ParseMode
+from pyrogram.enums import ParseMode, ChatType
 from config import Config
 from database import Database
 from quiz_manager import QuizManager
-from utils import parse_quiz_file, validate_quiz_data
+from sharding import ShardRouter
+from state import create_state_store
+from conversations import ConversationStore, ConversationTooLarge
+from workers import WorkerPool
+from metrics import LoopLagMonitor, Histogram
+from export import write_results, EXPORT_FIELDS, EXPORT_FORMATS
+from startquiz import start_quiz_request
+from utils import parse_quiz_path, parse_quiz_text, parse_bulk_file, format_import_report, format_stats, paginate_lines
 import logging
 
 logging.basicConfig(
@@ -22,9 +32,25 @@ app = Client(
 )
 
 db = Database()
-quiz_manager = QuizManager(app, db)
+state_store = create_state_store(db)
+if Config.SHARD_COUNT > 1:
+    quiz_manager = ShardRouter(Config.SHARD_COUNT, Config.SHARD_SOCKET)
+else:
+    quiz_manager = QuizManager(app, db, state_store)
+ingest_pool = WorkerPool(Config.INGEST_EXECUTOR, Config.INGEST_WORKERS, Config.INGEST_TIMEOUT)
+loop_monitor = LoopLagMonitor(Config.LOOP_LAG_INTERVAL, Config.LOOP_LAG_WARN_MS)
+conversations = ConversationStore(
+    state_store, Config.CONVERSATION_LIMIT, Config.CONVERSATION_TTL, Config.CONVERSATION_MAX_BYTES
+)
+
+start_latency = Histogram()
+
+SESSION_EXPIRED = "❌ Session expired. Please start again."
 
-user_states = {}
+
+async def reply_if_expired(user_id: int, message: Message):
+    if conversations.is_expired(user_id):
+        await message.reply_text(f"{SESSION_EXPIRED} Use /createquiz or /importquizzes.")
 
 
 @app.on_message(filters.command("start") & filters.private)
@@ -33,9 +59,16 @@ async def start_command(client: Client, message: Message):
         "**🎯 Welcome to Advanced Quiz Bot!**\n\n"
         "**Available Commands:**\n"
         "• /createquiz - Create a new quiz\n"
+        "• /importquizzes - Import many quizzes from one file\n"
         "• /startquiz <quiz_id> - Start a quiz\n"
         "• /quizstatus - View active quizzes\n"
+        "• /mystats - Your all-time quiz stats\n"
+        "• /quizstats <quiz_id> - Stats for a quiz\n"
+        "• /top [daily|weekly|<quiz_id>] - Top players\n"
         "• /cancelquiz - Cancel running quiz\n"
+        "• /pausequiz - Pause running quiz\n"
+        "• /resumequiz - Resume paused quiz\n"
+        "• /exportresults <quiz_id> [csv|ndjson] - Download your quiz results\n"
         "• /deletequiz <quiz_id> - Delete a quiz\n\n"
         "**Quiz File Format:**\n"
         "`Question | Option A | Option B | Option C | Option D | Correct Index (0-3) | Explanation`",
@@ -46,7 +79,7 @@ async def start_command(client: Client, message: Message):
 @app.on_message(filters.command("createquiz") & filters.private)
 async def create_quiz_command(client: Client, message: Message):
     user_id = message.from_user.id
-    user_states[user_id] = {"step": "select_method"}
+    await conversations.set(user_id, {"step": "select_method"})
     
     keyboard = InlineKeyboardMarkup([
         [InlineKeyboardButton("📄 Upload CSV File", callback_data="method_csv")],
@@ -67,7 +100,11 @@ async def method_selection(client: Client, callback_query):
     user_id = callback_query.from_user.id
     method = callback_query.data.split("_")[1]
     
-    user_states[user_id] = {"step": "awaiting_data", "method": method}
+    if not await conversations.get(user_id):
+        await callback_query.answer(SESSION_EXPIRED, show_alert=True)
+        return
+    
+    await conversations.set(user_id, {"step": "awaiting_data", "method": method})
     
     if method in ["csv", "txt"]:
         await callback_query.message.edit_text(
@@ -90,14 +127,77 @@ async def method_selection(client: Client, callback_query):
         )
 
 
+@app.on_message(filters.command("importquizzes") & filters.private)
+async def import_quizzes_command(client: Client, message: Message):
+    user_id = message.from_user.id
+    await conversations.set(user_id, {"step": "awaiting_bulk_file"})
+    
+    await message.reply_text(
+        "**📦 Bulk Quiz Import**\n\n"
+        "Upload a TXT file with one section per quiz, a CSV file (one quiz), "
+        "or a ZIP archive of CSV/TXT files.\n\n"
+        "**TXT sections:**\n"
+        "`### Quiz Name | Time per question (optional)`\n"
+        "`Question | Option A | Option B | Option C | Option D | Correct Index (0-3) | Explanation`\n\n"
+        f"Quizzes without a time use {Config.DEFAULT_QUESTION_TIME}s. Re-importing the same quiz is skipped.",
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+async def handle_bulk_upload(user_id: int, message: Message):
+    file_ext = message.document.file_name.split(".")[-1].lower()
+    
+    if file_ext not in ["csv", "txt", "zip"]:
+        await message.reply_text("❌ Please upload a CSV, TXT or ZIP file!")
+        return
+    
+    file_path = await message.download()
+    
+    try:
+        entries = await ingest_pool.run(
+            parse_bulk_file, file_path, file_ext, Config.DEFAULT_QUESTION_TIME,
+            time.monotonic() + Config.INGEST_TIMEOUT
+        )
+        
+        if not entries:
+            await message.reply_text("❌ No quizzes found in file!")
+            return
+        
+        report = await db.import_quizzes(user_id, entries)
+        await conversations.delete(user_id)
+        
+        await message.reply_text(
+            f"📦 **Import finished**\n\n{format_import_report(report)}",
+            parse_mode=ParseMode.MARKDOWN
+        )
+        
+    except asyncio.TimeoutError:
+        await message.reply_text("❌ File took too long to process!")
+    except Exception as e:
+        logger.error(f"Error importing quizzes: {e}")
+        await message.reply_text(f"❌ Error importing quizzes: {str(e)}")
+    finally:
+        os.remove(file_path)
+
+
 @app.on_message(filters.private & filters.document)
 async def handle_file_upload(client: Client, message: Message):
     user_id = message.from_user.id
     
-    if user_id not in user_states or user_states[user_id].get("step") != "awaiting_data":
+    state = await conversations.get(user_id)
+    
+    if state and state.get("step") == "awaiting_bulk_file":
+        await handle_bulk_upload(user_id, message)
         return
     
-    method = user_states[user_id].get("method")
+    if not state:
+        await reply_if_expired(user_id, message)
+        return
+    
+    if state.get("step") != "awaiting_data":
+        return
+    
+    method = state.get("method")
     file_ext = message.document.file_name.split(".")[-1].lower()
     
     if method == "csv" and file_ext != "csv":
@@ -111,71 +211,74 @@ async def handle_file_upload(client: Client, message: Message):
     file_path = await message.download()
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        questions = parse_quiz_file(content, file_ext)
-        
-        if not questions:
-            await message.reply_text("❌ No valid questions found in file!")
-            return
-        
-        is_valid, error_msg = validate_quiz_data(questions)
-        if not is_valid:
-            await message.reply_text(f"❌ **Validation Error:**\n{error_msg}", parse_mode=ParseMode.MARKDOWN)
-            return
-        
-        user_states[user_id] = {
-            "step": "awaiting_name",
-            "questions": questions
-        }
-        
-        await message.reply_text(
-            f"✅ **Parsed {len(questions)} questions successfully!**\n\n"
-            "📝 **Enter quiz name:**",
-            parse_mode=ParseMode.MARKDOWN
+        questions, errors, skipped = await ingest_pool.run(
+            parse_quiz_path, file_path, file_ext, time.monotonic() + Config.INGEST_TIMEOUT
         )
         
+        await accept_parsed_questions(user_id, message, questions, errors, skipped)
+        
+    except asyncio.TimeoutError:
+        await message.reply_text("❌ File took too long to process!")
     except Exception as e:
         logger.error(f"Error processing file: {e}")
         await message.reply_text(f"❌ Error processing file: {str(e)}")
+    finally:
+        os.remove(file_path)
+
+
+async def accept_parsed_questions(user_id: int, message: Message, questions: list, errors: list, skipped: list):
+    if errors:
+        error_text = "\n".join(errors[:10])
+        if len(errors) > 10:
+            error_text += f"\n...and {len(errors) - 10} more"
+        
+        await message.reply_text(f"❌ **Validation Error:**\n{error_text}", parse_mode=ParseMode.MARKDOWN)
+        return
+    
+    if not questions:
+        await message.reply_text("❌ No valid questions found!")
+        return
+    
+    try:
+        await conversations.set(user_id, {
+            "step": "awaiting_name",
+            "questions": questions
+        })
+    except ConversationTooLarge as e:
+        await message.reply_text(f"❌ {e}. Please split the quiz into smaller files.")
+        return
+    
+    skipped_text = f"⚠️ Skipped {len(skipped)} malformed rows.\n\n" if skipped else ""
+    
+    await message.reply_text(
+        f"✅ **Parsed {len(questions)} questions successfully!**\n\n"
+        f"{skipped_text}"
+        "📝 **Enter quiz name:**",
+        parse_mode=ParseMode.MARKDOWN
+    )
 
 
-@app.on_message(filters.private & filters.text & ~filters.command(["start", "createquiz", "startquiz", "quizstatus", "cancelquiz", "deletequiz"]))
+@app.on_message(filters.private & filters.text & ~filters.command(["start", "createquiz", "importquizzes", "startquiz", "quizstatus", "cancelquiz", "pausequiz", "resumequiz", "deletequiz", "botstats", "mystats", "quizstats", "top", "exportresults"]))
 async def handle_text_input(client: Client, message: Message):
     user_id = message.from_user.id
     
-    if user_id not in user_states:
-        return
+    state = await conversations.get(user_id)
     
-    state = user_states[user_id]
+    if not state:
+        await reply_if_expired(user_id, message)
+        return
     
     if state.get("step") == "awaiting_data" and state.get("method") == "paste":
         content = message.text
         
         try:
-            questions = parse_quiz_file(content, "txt")
-            
-            if not questions:
-                await message.reply_text("❌ No valid questions found!")
-                return
-            
-            is_valid, error_msg = validate_quiz_data(questions)
-            if not is_valid:
-                await message.reply_text(f"❌ **Validation Error:**\n{error_msg}", parse_mode=ParseMode.MARKDOWN)
-                return
-            
-            user_states[user_id] = {
-                "step": "awaiting_name",
-                "questions": questions
-            }
-            
-            await message.reply_text(
-                f"✅ **Parsed {len(questions)} questions successfully!**\n\n"
-                "📝 **Enter quiz name:**",
-                parse_mode=ParseMode.MARKDOWN
+            questions, errors, skipped = await ingest_pool.run(
+                parse_quiz_text, content, time.monotonic() + Config.INGEST_TIMEOUT
             )
+            await accept_parsed_questions(user_id, message, questions, errors, skipped)
             
+        except asyncio.TimeoutError:
+            await message.reply_text("❌ Text took too long to process!")
         except Exception as e:
             logger.error(f"Error processing text: {e}")
             await message.reply_text(f"❌ Error processing text: {str(e)}")
@@ -187,8 +290,9 @@ async def handle_text_input(client: Client, message: Message):
             await message.reply_text("❌ Quiz name must be at least 3 characters!")
             return
         
-        user_states[user_id]["quiz_name"] = quiz_name
-        user_states[user_id]["step"] = "awaiting_time"
+        state["quiz_name"] = quiz_name
+        state["step"] = "awaiting_time"
+        await conversations.set(user_id, state)
         
         keyboard = InlineKeyboardMarkup([
             [InlineKeyboardButton("⏱ 10 seconds", callback_data="time_10")],
@@ -211,7 +315,7 @@ async def handle_text_input(client: Client, message: Message):
                 await message.reply_text("❌ Time must be between 5 and 300 seconds!")
                 return
             
-            await finalize_quiz_creation(user_id, custom_time, message)
+            await finalize_quiz_creation(user_id, state, custom_time, message)
             
         except ValueError:
             await message.reply_text("❌ Please enter a valid number!")
@@ -221,31 +325,33 @@ async def handle_text_input(client: Client, message: Message):
 async def time_selection(client: Client, callback_query):
     user_id = callback_query.from_user.id
     
-    if user_id not in user_states:
-        await callback_query.answer("❌ Session expired. Please start again.", show_alert=True)
+    state = await conversations.get(user_id)
+    
+    if not state:
+        await callback_query.answer(SESSION_EXPIRED, show_alert=True)
         return
     
     time_option = callback_query.data.split("_")[1]
     
     if time_option == "custom":
-        user_states[user_id]["step"] = "awaiting_custom_time"
+        state["step"] = "awaiting_custom_time"
+        await conversations.set(user_id, state)
         await callback_query.message.edit_text(
             "⏱ **Enter custom time per question (5-300 seconds):**",
             parse_mode=ParseMode.MARKDOWN
         )
     else:
         time_per_question = int(time_option)
-        await finalize_quiz_creation(user_id, time_per_question, callback_query.message)
+        await finalize_quiz_creation(user_id, state, time_per_question, callback_query.message)
 
 
-async def finalize_quiz_creation(user_id: int, time_per_question: int, message: Message):
-    state = user_states[user_id]
+async def finalize_quiz_creation(user_id: int, state: dict, time_per_question: int, message: Message):
     quiz_name = state["quiz_name"]
     questions = state["questions"]
     
     quiz_id = await db.create_quiz(user_id, quiz_name, questions, time_per_question)
     
-    del user_states[user_id]
+    await conversations.delete(user_id)
     
     await message.reply_text(
         f"✅ **Quiz Created Successfully!**\n\n"
@@ -267,42 +373,35 @@ async def start_quiz_command(client: Client, message: Message):
     quiz_id = message.command[1]
     chat_id = message.chat.id
     user_id = message.from_user.id
+    started = time.monotonic()
     
-    quiz = await db.get_quiz(quiz_id)
-    
-    if not quiz:
-        await message.reply_text("❌ Quiz not found!")
-        return
+    quiz, error = await start_quiz_request(
+        db, quiz_manager, quiz_id, chat_id, user_id, message.chat.type == ChatType.PRIVATE, Config.FIRST_QUESTION_DELAY
+    )
     
-    if await quiz_manager.is_quiz_running(chat_id):
-        await message.reply_text("❌ A quiz is already running in this chat!")
+    if error:
+        await message.reply_text(error, parse_mode=ParseMode.MARKDOWN)
         return
     
-    has_attempted = await db.has_user_attempted(quiz_id, user_id)
-    if has_attempted and message.chat.type == "private":
-        await message.reply_text("❌ You have already attempted this quiz!")
-        return
+    start_latency.observe((time.monotonic() - started) * 1000)
     
     await message.reply_text(
         f"🎯 **Starting Quiz: {quiz['name']}**\n\n"
         f"**Total Questions:** {len(quiz['questions'])}\n"
         f"**Time per Question:** {quiz['time_per_question']}s\n\n"
-        "Get ready! First question in 3 seconds...",
+        f"Get ready! First question in {Config.FIRST_QUESTION_DELAY} seconds...",
         parse_mode=ParseMode.MARKDOWN
     )
-    
-    await asyncio.sleep(3)
-    await quiz_manager.start_quiz(chat_id, quiz_id, quiz)
 
 
 @app.on_poll_answer()
 async def handle_poll_answer(client: Client, poll_answer):
-    await quiz_manager.handle_answer(poll_answer)
+    quiz_manager.handle_answer(poll_answer)
 
 
 @app.on_message(filters.command("quizstatus"))
 async def quiz_status_command(client: Client, message: Message):
-    active_quizzes = quiz_manager.get_active_quizzes()
+    active_quizzes = await quiz_manager.get_quiz_summaries()
     
     if not active_quizzes:
         await message.reply_text("📊 No active quizzes running.")
@@ -314,16 +413,100 @@ async def quiz_status_command(client: Client, message: Message):
         quiz_name = quiz_data.get("quiz_name", "Unknown")
         current = quiz_data.get("current_question", 0) + 1
         total = quiz_data.get("total_questions", 0)
-        participants = len(quiz_data.get("participants", {}))
+        participants = quiz_data.get("participants", 0)
         
         status_text += f"**Chat ID:** `{chat_id}`\n"
         status_text += f"**Quiz:** {quiz_name}\n"
         status_text += f"**Progress:** {current}/{total}\n"
+        if quiz_data.get("paused"):
+            status_text += "**Status:** ⏸ Paused\n"
         status_text += f"**Participants:** {participants}\n\n"
     
     await message.reply_text(status_text, parse_mode=ParseMode.MARKDOWN)
 
 
+@app.on_message(filters.command("mystats"))
+async def my_stats_command(client: Client, message: Message):
+    if not message.from_user:
+        return
+    
+    stats = await db.get_user_stats(message.from_user.id)
+    
+    if not stats:
+        await message.reply_text("📊 You haven't finished any quizzes yet.")
+        return
+    
+    questions = stats.get("questions", 0)
+    accuracy = (stats.get("correct", 0) / questions * 100) if questions > 0 else 0
+    
+    await message.reply_text(
+        f"📊 **Stats for {message.from_user.first_name}**\n\n"
+        f"**Quizzes played:** {stats.get('attempts', 0)}\n"
+        f"**Correct answers:** {stats.get('correct', 0)}/{questions}\n"
+        f"**Accuracy:** {accuracy:.1f}%",
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+@app.on_message(filters.command("quizstats"))
+async def quiz_stats_command(client: Client, message: Message):
+    if len(message.command) < 2:
+        await message.reply_text("❌ **Usage:** `/quizstats <quiz_id>`", parse_mode=ParseMode.MARKDOWN)
+        return
+    
+    quiz_id = message.command[1]
+    stats = await db.get_quiz_stats(quiz_id)
+    
+    if not stats:
+        await message.reply_text("📊 No results recorded for this quiz yet.")
+        return
+    
+    attempts = stats.get("attempts", 0)
+    questions = stats.get("questions", 0)
+    average = (stats.get("correct", 0) / attempts) if attempts > 0 else 0
+    accuracy = (stats.get("correct", 0) / questions * 100) if questions > 0 else 0
+    
+    await message.reply_text(
+        f"📊 **Quiz `{quiz_id}` Stats**\n\n"
+        f"**Attempts:** {attempts}\n"
+        f"**Average score:** {average:.1f}\n"
+        f"**Best score:** {stats.get('best_correct', 0)}\n"
+        f"**Accuracy:** {accuracy:.1f}%",
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+@app.on_message(filters.command("top"))
+async def top_command(client: Client, message: Message):
+    scope = message.command[1] if len(message.command) > 1 else "global"
+    titles = {"global": "All Time", "daily": "Last 24 Hours", "weekly": "Last 7 Days"}
+    
+    if scope in titles:
+        title = titles[scope]
+    else:
+        title = f"Quiz `{scope}`"
+        scope = f"quiz:{scope}"
+    
+    snapshot = await db.get_leaderboard_snapshot(scope)
+    
+    if not snapshot or not snapshot["entries"]:
+        await message.reply_text("🏆 No rankings yet. Leaderboards are refreshed every few minutes.")
+        return
+    
+    lines = [f"🏆 **Top Players — {title}**", ""]
+    
+    for rank, entry in enumerate(snapshot["entries"], 1):
+        medal = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else f"{rank}."
+        questions = entry.get("questions", 0)
+        accuracy = (entry["correct"] / questions * 100) if questions > 0 else 0
+        lines.append(f"{medal} **{entry['first_name']}** — {entry['correct']} correct — {accuracy:.1f}%")
+    
+    lines.extend(["", f"_Updated {snapshot['generated_at'].strftime('%Y-%m-%d %H:%M')} UTC_"])
+    
+    for page in paginate_lines(lines):
+        await message.reply_text(page, parse_mode=ParseMode.MARKDOWN)
+
+
 @app.on_message(filters.command("cancelquiz"))
 async def cancel_quiz_command(client: Client, message: Message):
     chat_id = message.chat.id
@@ -336,6 +519,36 @@ async def cancel_quiz_command(client: Client, message: Message):
     await message.reply_text("✅ Quiz cancelled successfully!")
 
 
+@app.on_message(filters.command("pausequiz"))
+async def pause_quiz_command(client: Client, message: Message):
+    chat_id = message.chat.id
+    
+    if not await quiz_manager.is_quiz_running(chat_id):
+        await message.reply_text("❌ No quiz is running in this chat!")
+        return
+    
+    if not await quiz_manager.pause_quiz(chat_id):
+        await message.reply_text("❌ Quiz is already paused!")
+        return
+    
+    await message.reply_text("⏸ Quiz paused. Use /resumequiz to continue.")
+
+
+@app.on_message(filters.command("resumequiz"))
+async def resume_quiz_command(client: Client, message: Message):
+    chat_id = message.chat.id
+    
+    if not await quiz_manager.is_quiz_running(chat_id):
+        await message.reply_text("❌ No quiz is running in this chat!")
+        return
+    
+    if not await quiz_manager.resume_quiz(chat_id):
+        await message.reply_text("❌ Quiz is not paused!")
+        return
+    
+    await message.reply_text("▶️ Quiz resumed!")
+
+
 @app.on_message(filters.command("deletequiz") & filters.private)
 async def delete_quiz_command(client: Client, message: Message):
     if len(message.command) < 2:
@@ -355,17 +568,99 @@ async def delete_quiz_command(client: Client, message: Message):
         await message.reply_text("❌ You can only delete quizzes you created!")
         return
     
+    # Stop running instances first so none of them can start saving results after the tombstone
+    cancelled = await quiz_manager.cancel_quiz_runs(quiz_id, f"🛑 Quiz **{quiz['name']}** was deleted by its creator.")
     success = await db.delete_quiz(quiz_id)
     
-    if success:
-        await message.reply_text(f"✅ Quiz `{quiz_id}` deleted successfully!", parse_mode=ParseMode.MARKDOWN)
-    else:
+    if not success:
         await message.reply_text("❌ Failed to delete quiz!")
+        return
+    
+    cancelled_text = f"\nStopped it in {cancelled} chat(s)." if cancelled else ""
+    
+    await message.reply_text(
+        f"✅ Quiz `{quiz_id}` deleted successfully!{cancelled_text}\n"
+        "Its results are being removed in the background.",
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+@app.on_message(filters.command("exportresults") & filters.private)
+async def export_results_command(client: Client, message: Message):
+    if len(message.command) < 2:
+        await message.reply_text("❌ **Usage:** `/exportresults <quiz_id> [csv|ndjson]`", parse_mode=ParseMode.MARKDOWN)
+        return
+    
+    quiz_id = message.command[1]
+    file_format = message.command[2].lower() if len(message.command) > 2 else "csv"
+    
+    if file_format not in EXPORT_FORMATS:
+        await message.reply_text("❌ Format must be csv or ndjson!")
+        return
+    
+    quiz = await db.get_quiz(quiz_id)
+    
+    if not quiz:
+        await message.reply_text("❌ Quiz not found!")
+        return
+    
+    if quiz["creator_id"] != message.from_user.id:
+        await message.reply_text("❌ You can only export results of quizzes you created!")
+        return
+    
+    fd, file_path = tempfile.mkstemp(suffix=f".{file_format}")
+    
+    try:
+        # Rows are encoded as the cursor yields them, so memory stays flat however many there are
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as out:
+            rows = db.iter_results(quiz_id, EXPORT_FIELDS, Config.EXPORT_BATCH_SIZE)
+            exported = await write_results(rows, file_format, out)
+        
+        if not exported:
+            await message.reply_text("📊 No results recorded for this quiz yet.")
+            return
+        
+        await message.reply_document(
+            file_path,
+            file_name=f"results_{quiz_id}.{file_format}",
+            caption=f"📊 {exported} results for **{quiz['name']}**",
+            parse_mode=ParseMode.MARKDOWN
+        )
+    except Exception as e:
+        logger.error(f"Error exporting results for quiz {quiz_id}: {e}")
+        await message.reply_text(f"❌ Error exporting results: {str(e)}")
+    finally:
+        os.remove(file_path)
+
+
+@app.on_message(filters.command("botstats"))
+async def bot_stats_command(client: Client, message: Message):
+    if not message.from_user or message.from_user.id not in Config.ADMIN_IDS:
+        return
+    
+    stats = {
+        "database": db.stats(),
+        "quizzes": await quiz_manager.get_stats(),
+        "ingest": ingest_pool.stats(),
+        "loop_lag_ms": loop_monitor.lag.summary(),
+        "startquiz_ms": start_latency.summary(),
+        "conversations": conversations.stats()
+    }
+    
+    for page in paginate_lines(["📈 Bot stats", ""] + format_stats(stats)):
+        await message.reply_text(page)
 
 
 async def main():
     await db.connect()
+    db.start_health_check()
+    db.start_leaderboard_refresh()
+    db.start_reaper()
+    ingest_pool.start()
+    loop_monitor.start()
+    quiz_manager.start()
     await app.start()
+    await quiz_manager.resume_runs()
     logger.info("Bot started successfully!")
     await asyncio.Event().wait()
 
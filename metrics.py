@@ -0,0 +1,93 @@
+import asyncio
+import bisect
+import time
+import logging
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def observe(self, value_ms: float):
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+    
+    def percentile(self, pct: float) -> float:
+        if self.count == 0:
+            return 0.0
+        
+        target = self.count * pct / 100
+        seen = 0
+        
+        for idx, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.buckets[idx] if idx < len(self.buckets) else self.max
+        
+        return self.max
+    
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": (self.total / self.count) if self.count > 0 else 0.0,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max
+        }
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float, warn_ms: float):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.lag = Histogram()
+        self._task = None
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.monotonic() - expected) * 1000)
+            self.lag.observe(lag_ms)
+            
+            if lag_ms > self.warn_ms:
+                logger.warning(f"Event loop blocked for {lag_ms:.0f}ms")
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    # Called from the driver's threads; a lost increment under contention is acceptable for metrics
+    def __init__(self):
+        self.latency = {}
+        self.failures = {}
+    
+    def started(self, event):
+        pass
+    
+    def succeeded(self, event):
+        self.latency.setdefault(event.command_name, Histogram()).observe(event.duration_micros / 1000)
+    
+    def failed(self, event):
+        self.latency.setdefault(event.command_name, Histogram()).observe(event.duration_micros / 1000)
+        self.failures[event.command_name] = self.failures.get(event.command_name, 0) + 1
+    
+    def stats(self) -> dict:
+        return {
+            name: dict(hist.summary(), failures=self.failures.get(name, 0))
+            for name, hist in self.latency.items()
+        }
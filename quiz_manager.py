@@ -1,192 +1,660 @@
 import asyncio
+import heapq
+import time
+from types import MappingProxyType
 from pyrogram import Client
 from pyrogram.enums import ParseMode
+from config import Config
 from database import Database
+from answer_queue import AnswerQueue
+from scheduler import Scheduler
+from dispatcher import SendDispatcher, PRIORITY_LEADERBOARD
+from metrics import Histogram
+from state import MemoryStateStore, RunCheckpointStore
+from ranking import Ranking
+from cache import TTLCache
+from utils import validate_question, paginate_lines
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class PollRecord:
+    __slots__ = ("chat_id", "quiz_id", "question_index", "correct_option")
+    
+    def __init__(self, chat_id: int, quiz_id: str, question_index: int, correct_option: int):
+        self.chat_id = chat_id
+        self.quiz_id = quiz_id
+        self.question_index = question_index
+        self.correct_option = correct_option
+
+
+class Participant:
+    __slots__ = ("first_name", "correct", "wrong", "answered")
+    
+    def __init__(self, first_name: str):
+        self.first_name = first_name
+        self.correct = 0
+        self.wrong = 0
+        # Bit N is set once question N has been answered (quizzes cap at 100 questions)
+        self.answered = 0
+    
+    def record_answer(self, question_index: int, is_correct: bool) -> bool:
+        bit = 1 << question_index
+        
+        if self.answered & bit:
+            return False
+        
+        self.answered |= bit
+        
+        if is_correct:
+            self.correct += 1
+        else:
+            self.wrong += 1
+        
+        return True
+
+
 class QuizManager:
-    def __init__(self, app: Client, db: Database):
+    def __init__(self, app: Client, db: Database, state=None):
         self.app = app
         self.db = db
+        self.state = state if state is not None else MemoryStateStore()
+        # Checkpoints are the only persisted copy of run state; they go to the
+        # shared store when there is one and to quiz_runs otherwise
+        self.runs = db if isinstance(self.state, MemoryStateStore) else RunCheckpointStore(self.state)
         self.active_quizzes = {}
+        self.payload_cache = TTLCache(Config.QUIZ_CACHE_SIZE, Config.QUIZ_CACHE_TTL)
         self.poll_mapping = {}
+        self.chat_polls = {}
+        self.answer_queue = AnswerQueue(
+            self._apply_answers, Config.ANSWER_QUEUE_SIZE, Config.ANSWER_BATCH_SIZE
+        )
+        self.scheduler = Scheduler()
+        self.dispatcher = SendDispatcher(app)
+        self.send_latency = Histogram()
+        self.question_gap = Histogram()
+        self._send_latency_avg = 0.0
+        self._dirty_runs = set()
+        self._checkpoint_lock = asyncio.Lock()
+        self._checkpoint_task = None
+        self.on_poll_opened = None
+        self.on_poll_closed = None
+    
+    def start(self):
+        self.answer_queue.start()
+        self.scheduler.start()
+        self.dispatcher.start()
+        
+        if self._checkpoint_task is None:
+            self._checkpoint_task = asyncio.create_task(self._checkpoint_loop())
     
     async def is_quiz_running(self, chat_id: int) -> bool:
         return chat_id in self.active_quizzes
     
-    def get_active_quizzes(self):
-        return self.active_quizzes.copy()
+    async def get_quiz_summaries(self) -> dict:
+        return {
+            chat_id: {
+                "quiz_name": quiz_data["quiz_name"],
+                "current_question": quiz_data["current_question"],
+                "total_questions": quiz_data["total_questions"],
+                "participants": len(quiz_data["participants"]),
+                "paused": quiz_data["paused"]
+            }
+            for chat_id, quiz_data in self.active_quizzes.items()
+        }
+    
+    async def get_stats(self) -> dict:
+        return {
+            "active_quizzes": len(self.active_quizzes),
+            "open_polls": len(self.poll_mapping),
+            "answer_queue": self.answer_queue.stats(),
+            "scheduler": self.scheduler.stats(),
+            "dispatcher": self.dispatcher.stats(),
+            "send_latency_ms": self.send_latency.summary(),
+            "question_gap_ms": self.question_gap.summary()
+        }
+    
+    def get_leaderboard(self, chat_id: int, limit: int = None) -> list:
+        if chat_id not in self.active_quizzes:
+            return []
+        
+        quiz_data = self.active_quizzes[chat_id]
+        participants = quiz_data["participants"]
+        total_questions = quiz_data["total_questions"]
+        
+        return [
+            {
+                "user_id": user_id,
+                "first_name": participants[user_id].first_name,
+                "correct": correct,
+                "total": total_questions,
+                "accuracy": (correct / total_questions * 100) if total_questions > 0 else 0
+            }
+            for user_id, correct in self._top(quiz_data, limit or Config.LEADERBOARD_SIZE)
+        ]
     
-    async def start_quiz(self, chat_id: int, quiz_id: str, quiz: dict):
-        self.active_quizzes[chat_id] = {
+    @staticmethod
+    def _top(quiz_data: dict, limit: int) -> list:
+        ranking = quiz_data["ranking"]
+        if ranking is not None:
+            return ranking.top(limit)
+        
+        # Without a live scoreboard the order is only needed once, when the quiz ends
+        top = heapq.nlargest(limit, quiz_data["participants"].items(), key=lambda item: item[1].correct)
+        return [(user_id, participant.correct) for user_id, participant in top]
+    
+    @staticmethod
+    def _leaderboard_lines(results: list) -> list:
+        lines = []
+        
+        for rank, result in enumerate(results, 1):
+            medal = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else f"{rank}."
+            lines.append(
+                f"{medal} **{result['first_name']}** — "
+                f"Score: {result['correct']}/{result['total']} — "
+                f"Accuracy: {result['accuracy']:.1f}%"
+            )
+        
+        return lines
+    
+    async def start_quiz(self, chat_id: int, quiz_id: str, quiz: dict, delay: float = 0):
+        if chat_id in self.active_quizzes:
+            raise ValueError("A quiz is already running in this chat")
+        
+        self.active_quizzes[chat_id] = self._new_run(quiz_id, quiz)
+        self._dirty_runs.add(chat_id)
+        
+        self._schedule_question(chat_id, delay)
+    
+    @staticmethod
+    def build_poll_payloads(questions, time_per_question: int) -> tuple:
+        payloads = []
+        
+        for idx, question in enumerate(questions, 1):
+            error = validate_question(question)
+            if error:
+                raise ValueError(f"Question {idx}: {error}")
+            
+            payloads.append(MappingProxyType({
+                "question": question["question"],
+                "options": (
+                    question["option_a"],
+                    question["option_b"],
+                    question["option_c"],
+                    question["option_d"]
+                ),
+                "type": "quiz",
+                "correct_option_id": question["correct_option"],
+                "explanation": question.get("explanation", ""),
+                "is_anonymous": False,
+                "open_period": time_per_question
+            }))
+        
+        return tuple(payloads)
+    
+    def _poll_payloads(self, quiz_id: str, quiz) -> tuple:
+        # Runs of the same quiz share one read-only payload tuple, like they share the cached quiz
+        key = (quiz_id, quiz["time_per_question"])
+        cached = self.payload_cache.get(key)
+        
+        if cached is not None and cached[0] is quiz:
+            return cached[1]
+        
+        payloads = self.build_poll_payloads(quiz["questions"], quiz["time_per_question"])
+        self.payload_cache.put(key, (quiz, payloads))
+        return payloads
+    
+    def _new_run(self, quiz_id: str, quiz) -> dict:
+        return {
             "quiz_id": quiz_id,
             "quiz_name": quiz["name"],
-            "questions": quiz["questions"],
+            "payloads": self._poll_payloads(quiz_id, quiz),
             "current_question": 0,
+            "next_question": 0,
+            "question_sent_at": None,
             "total_questions": len(quiz["questions"]),
             "time_per_question": quiz["time_per_question"],
             "participants": {},
-            "task": None
+            # Kept sorted on every answer, so only worth it while a live scoreboard reads it
+            "ranking": Ranking() if Config.LIVE_SCOREBOARD else None,
+            "scoreboard_message_id": None,
+            "scoreboard_top": None,
+            "dirty_participants": set(),
+            "new_polls": {},
+            "paused": False,
+            "poll_closes_at": None,
+            "gaps": []
         }
+    
+    def _schedule_question(self, chat_id: int, delay: float):
+        key = ("quiz", chat_id)
+        self.scheduler.schedule(key, delay, self._send_question, chat_id)
         
-        asyncio.create_task(self._run_quiz(chat_id))
+        if self.active_quizzes[chat_id]["paused"]:
+            self.scheduler.pause(key)
     
-    async def _run_quiz(self, chat_id: int):
-        quiz_data = self.active_quizzes[chat_id]
-        questions = quiz_data["questions"]
+    async def _send_question(self, chat_id: int):
+        quiz_data = self.active_quizzes.get(chat_id)
+        if quiz_data is None:
+            return
+        
+        idx = quiz_data["next_question"]
         time_per_question = quiz_data["time_per_question"]
         
         try:
-            for idx, question in enumerate(questions):
-                quiz_data["current_question"] = idx
-                
-                poll_message = await self.app.send_poll(
-                    chat_id=chat_id,
-                    question=question["question"],
-                    options=[
-                        question["option_a"],
-                        question["option_b"],
-                        question["option_c"],
-                        question["option_d"]
-                    ],
-                    type="quiz",
-                    correct_option_id=question["correct_option"],
-                    explanation=question.get("explanation", ""),
-                    is_anonymous=False,
-                    open_period=time_per_question
-                )
-                
-                self.poll_mapping[poll_message.poll.id] = {
-                    "chat_id": chat_id,
-                    "quiz_id": quiz_data["quiz_id"],
-                    "question_index": idx,
-                    "correct_option": question["correct_option"]
-                }
-                
-                await asyncio.sleep(time_per_question + 2)
+            if idx >= quiz_data["total_questions"]:
+                await self._end_quiz(chat_id)
+                return
+            
+            payload = quiz_data["payloads"][idx]
+            sent_at = time.monotonic()
             
-            await self._end_quiz(chat_id)
+            poll_message = await self.dispatcher.send_poll(chat_id=chat_id, **payload)
+            
+            opened_at = time.monotonic()
+            latency = opened_at - sent_at
+            self.send_latency.observe(latency * 1000)
+            self._send_latency_avg = 0.8 * self._send_latency_avg + 0.2 * latency
             
         except asyncio.CancelledError:
             logger.info(f"Quiz cancelled in chat {chat_id}")
+            raise
         except Exception as e:
             logger.error(f"Error running quiz in chat {chat_id}: {e}")
-            await self.app.send_message(chat_id, f"❌ Quiz error: {str(e)}")
-            await self._cleanup_quiz(chat_id)
+            
+            # The notice goes through the same failing chat, so it must not keep the run alive
+            try:
+                await self.dispatcher.send_message(chat_id, f"❌ Quiz error: {str(e)}")
+            except Exception as notice_error:
+                logger.warning(f"Could not send quiz error notice in chat {chat_id}: {notice_error}")
+            finally:
+                await self._cleanup_quiz(chat_id)
+            return
+        
+        if chat_id not in self.active_quizzes:
+            return
+        
+        if quiz_data["poll_closes_at"] is not None:
+            gap_ms = (opened_at - quiz_data["poll_closes_at"]) * 1000
+            self.question_gap.observe(max(0.0, gap_ms))
+            quiz_data["gaps"].append(gap_ms)
+        
+        correct_option = payload["correct_option_id"]
+        quiz_data["current_question"] = idx
+        quiz_data["next_question"] = idx + 1
+        quiz_data["question_sent_at"] = time.time()
+        quiz_data["poll_closes_at"] = opened_at + time_per_question
+        quiz_data["new_polls"][poll_message.poll.id] = [idx, correct_option]
+        self._dirty_runs.add(chat_id)
+        
+        self._register_poll(
+            poll_message.poll.id,
+            PollRecord(chat_id, quiz_data["quiz_id"], idx, correct_option),
+            time_per_question
+        )
+        
+        self._schedule_question(chat_id, self._next_question_delay(time_per_question))
+    
+    def _next_question_delay(self, time_per_question: int) -> float:
+        # The poll is open by the time send_poll returns; start the next send early
+        # by the observed send latency so it lands QUESTION_GAP after this one closes
+        return max(time_per_question, time_per_question + Config.QUESTION_GAP - self._send_latency_avg)
+    
+    async def pause_quiz(self, chat_id: int) -> bool:
+        quiz_data = self.active_quizzes.get(chat_id)
+        if quiz_data is None or quiz_data["paused"]:
+            return False
+        
+        quiz_data["paused"] = True
+        quiz_data["poll_closes_at"] = None
+        self._dirty_runs.add(chat_id)
+        self.scheduler.pause(("quiz", chat_id))
+        return True
     
-    async def handle_answer(self, poll_answer):
-        poll_id = poll_answer.poll_id
+    async def resume_quiz(self, chat_id: int) -> bool:
+        quiz_data = self.active_quizzes.get(chat_id)
+        if quiz_data is None or not quiz_data["paused"]:
+            return False
         
-        if poll_id not in self.poll_mapping:
+        quiz_data["paused"] = False
+        self._dirty_runs.add(chat_id)
+        self.scheduler.resume(("quiz", chat_id))
+        return True
+    
+    def _register_poll(self, poll_id: str, record: PollRecord, open_period: float):
+        self.poll_mapping[poll_id] = record
+        self.chat_polls.setdefault(record.chat_id, set()).add(poll_id)
+        
+        self.scheduler.schedule(
+            ("poll", poll_id), open_period + Config.POLL_RETIRE_GRACE, self._retire_poll, poll_id
+        )
+        
+        if self.on_poll_opened is not None:
+            self.on_poll_opened(poll_id)
+    
+    def _retire_poll(self, poll_id: str):
+        record = self.poll_mapping.pop(poll_id, None)
+        if record is None:
             return
         
-        poll_data = self.poll_mapping[poll_id]
-        chat_id = poll_data["chat_id"]
+        if self.on_poll_closed is not None:
+            self.on_poll_closed(poll_id)
         
-        if chat_id not in self.active_quizzes:
+        chat_polls = self.chat_polls.get(record.chat_id)
+        if chat_polls is not None:
+            chat_polls.discard(poll_id)
+            if not chat_polls:
+                del self.chat_polls[record.chat_id]
+    
+    def handle_answer(self, poll_answer) -> bool:
+        if poll_answer.poll_id not in self.poll_mapping:
+            return False
+        
+        return self.answer_queue.put(poll_answer)
+    
+    async def _apply_answers(self, poll_id: str, poll_answers: list):
+        poll_data = self.poll_mapping.get(poll_id)
+        if poll_data is None:
             return
         
-        quiz_data = self.active_quizzes[chat_id]
-        user_id = poll_answer.user.id
-        first_name = poll_answer.user.first_name
-        
-        if user_id not in quiz_data["participants"]:
-            quiz_data["participants"][user_id] = {
-                "first_name": first_name,
-                "correct": 0,
-                "wrong": 0,
-                "answered": set()
-            }
+        quiz_data = self.active_quizzes.get(poll_data.chat_id)
+        if quiz_data is None:
+            return
         
-        participant = quiz_data["participants"][user_id]
-        question_index = poll_data["question_index"]
+        participants = quiz_data["participants"]
+        ranking = quiz_data["ranking"]
+        question_index = poll_data.question_index
+        correct_option = poll_data.correct_option
         
-        if question_index in participant["answered"]:
+        for poll_answer in poll_answers:
+            user = poll_answer.user
+            
+            participant = participants.get(user.id)
+            if participant is None:
+                participant = participants[user.id] = Participant(user.first_name)
+                if ranking is not None:
+                    ranking.update(user.id, 0)
+            
+            is_correct = poll_answer.option_ids[0] == correct_option
+            
+            if participant.record_answer(question_index, is_correct):
+                quiz_data["dirty_participants"].add(user.id)
+                
+                if is_correct and ranking is not None:
+                    ranking.update(user.id, participant.correct)
+        
+        self._dirty_runs.add(poll_data.chat_id)
+        self._touch_scoreboard(poll_data.chat_id)
+    
+    def _touch_scoreboard(self, chat_id: int):
+        key = ("scoreboard", chat_id)
+        
+        # Answers only arm the timer, so a burst of answers costs one edit per interval
+        if Config.LIVE_SCOREBOARD and not self.scheduler.is_scheduled(key):
+            self.scheduler.schedule(key, Config.SCOREBOARD_INTERVAL, self._update_scoreboard, chat_id)
+    
+    async def _update_scoreboard(self, chat_id: int, final: bool = False):
+        quiz_data = self.active_quizzes.get(chat_id)
+        if quiz_data is None:
             return
         
-        participant["answered"].add(question_index)
+        message_id = quiz_data["scoreboard_message_id"]
+        
+        if final and message_id is None:
+            return
         
-        selected_option = poll_answer.option_ids[0]
-        correct_option = poll_data["correct_option"]
+        top = self._top(quiz_data, Config.SCOREBOARD_SIZE)
         
-        if selected_option == correct_option:
-            participant["correct"] += 1
-        else:
-            participant["wrong"] += 1
+        if not final and top == quiz_data["scoreboard_top"]:
+            return
+        
+        quiz_data["scoreboard_top"] = top
+        title = "🏁 **Final Standings" if final else "📊 **Live Scoreboard"
+        lines = [
+            f"{title}: {quiz_data['quiz_name']}**",
+            f"Question {quiz_data['current_question'] + 1}/{quiz_data['total_questions']}",
+            ""
+        ]
+        text = paginate_lines(lines + self._leaderboard_lines(self.get_leaderboard(chat_id, Config.SCOREBOARD_SIZE)))[0]
+        
+        try:
+            if message_id is None:
+                message = await self.dispatcher.send_message(
+                    chat_id, text, priority=PRIORITY_LEADERBOARD, parse_mode=ParseMode.MARKDOWN
+                )
+                quiz_data["scoreboard_message_id"] = message.id
+                await self.dispatcher.submit(
+                    "pin_chat_message", chat_id, PRIORITY_LEADERBOARD,
+                    message_id=message.id, disable_notification=True
+                )
+            else:
+                await self.dispatcher.submit(
+                    "edit_message_text", chat_id, PRIORITY_LEADERBOARD,
+                    message_id=message_id, text=text, parse_mode=ParseMode.MARKDOWN
+                )
+        except Exception as e:
+            logger.warning(f"Could not update live scoreboard in chat {chat_id}: {e}")
     
     async def _end_quiz(self, chat_id: int):
         quiz_data = self.active_quizzes[chat_id]
         quiz_id = quiz_data["quiz_id"]
         total_questions = quiz_data["total_questions"]
         participants = quiz_data["participants"]
+        gaps = quiz_data["gaps"]
+        
+        if gaps:
+            logger.info(
+                f"Quiz {quiz_id} in chat {chat_id}: gap between questions "
+                f"avg {sum(gaps) / len(gaps):.0f}ms, max {max(gaps):.0f}ms"
+            )
         
-        for user_id, data in participants.items():
-            correct = data["correct"]
-            wrong = data["wrong"]
+        for user_id, participant in participants.items():
+            correct = participant.correct
+            wrong = participant.wrong
             accuracy = (correct / total_questions * 100) if total_questions > 0 else 0
             
-            await self.db.save_result(
+            self.db.queue_result(
                 quiz_id=quiz_id,
                 chat_id=chat_id,
                 user_id=user_id,
-                first_name=data["first_name"],
+                first_name=participant.first_name,
                 correct=correct,
                 wrong=wrong,
                 total=total_questions,
                 accuracy=accuracy
             )
         
-        await self._send_leaderboard(chat_id, quiz_id, quiz_data["quiz_name"])
+        self.scheduler.cancel(("scoreboard", chat_id))
+        await self._update_scoreboard(chat_id, final=True)
+        await self._send_leaderboard(chat_id, quiz_data["quiz_name"])
+        
+        try:
+            # A cancelled run must not take the whole pending buffer down with it
+            await asyncio.shield(self.db.flush_results())
+        except Exception as e:
+            logger.error(f"Error saving results for quiz {quiz_id} in chat {chat_id}: {e}")
         
         await self._cleanup_quiz(chat_id)
     
-    async def _send_leaderboard(self, chat_id: int, quiz_id: str, quiz_name: str):
-        results = await self.db.get_quiz_results(quiz_id, chat_id)
+    async def _send_leaderboard(self, chat_id: int, quiz_name: str):
+        results = self.get_leaderboard(chat_id)
         
         if not results:
-            await self.app.send_message(
+            await self.dispatcher.send_message(
                 chat_id,
                 "🏆 **Quiz Completed!**\n\nNo participants found.",
+                priority=PRIORITY_LEADERBOARD,
                 parse_mode=ParseMode.MARKDOWN
             )
             return
         
-        leaderboard_text = f"🏆 **Quiz Completed: {quiz_name}**\n\n📊 **Leaderboard:**\n\n"
+        lines = [f"🏆 **Quiz Completed: {quiz_name}**", "", "📊 **Leaderboard:**", ""]
         
-        for rank, result in enumerate(results, 1):
-            medal = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else f"{rank}."
-            leaderboard_text += (
-                f"{medal} **{result['first_name']}** — "
-                f"Score: {result['correct']}/{result['total']} — "
-                f"Accuracy: {result['accuracy']:.1f}%\n"
+        # Pages are sent one after another so they arrive in rank order
+        for page in paginate_lines(lines + self._leaderboard_lines(results)):
+            await self.dispatcher.send_message(
+                chat_id, page, priority=PRIORITY_LEADERBOARD, parse_mode=ParseMode.MARKDOWN
             )
-        
-        await self.app.send_message(chat_id, leaderboard_text, parse_mode=ParseMode.MARKDOWN)
     
     async def cancel_quiz(self, chat_id: int):
         if chat_id in self.active_quizzes:
-            quiz_data = self.active_quizzes[chat_id]
-            
-            if quiz_data.get("task"):
-                quiz_data["task"].cancel()
-            
+            self.scheduler.cancel(("quiz", chat_id))
             await self._cleanup_quiz(chat_id)
     
+    async def cancel_quiz_runs(self, quiz_id: str, reason: str) -> int:
+        chat_ids = [chat_id for chat_id, quiz_data in self.active_quizzes.items() if quiz_data["quiz_id"] == quiz_id]
+        
+        for chat_id in chat_ids:
+            await self.cancel_quiz(chat_id)
+            
+            try:
+                await self.dispatcher.send_message(chat_id, reason, parse_mode=ParseMode.MARKDOWN)
+            except Exception as e:
+                logger.warning(f"Could not notify chat {chat_id} about cancelled quiz {quiz_id}: {e}")
+        
+        return len(chat_ids)
+    
     async def _cleanup_quiz(self, chat_id: int):
         if chat_id in self.active_quizzes:
-            quiz_data = self.active_quizzes[chat_id]
+            self.scheduler.cancel(("quiz", chat_id), running=False)
+            self.scheduler.cancel(("scoreboard", chat_id))
             
-            polls_to_remove = [
-                poll_id for poll_id, data in self.poll_mapping.items()
-                if data["chat_id"] == chat_id
-            ]
-            
-            for poll_id in polls_to_remove:
-                del self.poll_mapping[poll_id]
+            for poll_id in self.chat_polls.pop(chat_id, ()):
+                self.poll_mapping.pop(poll_id, None)
+                self.scheduler.cancel(("poll", poll_id))
+                
+                if self.on_poll_closed is not None:
+                    self.on_poll_closed(poll_id)
             
             del self.active_quizzes[chat_id]
+            self._dirty_runs.discard(chat_id)
+            
+            try:
+                # Wait out any in-flight checkpoint so its upsert can't recreate the run
+                async with self._checkpoint_lock:
+                    await self.runs.delete_run(chat_id)
+            except Exception as e:
+                logger.error(f"Error deleting checkpoint for chat {chat_id}: {e}")
             
             logger.info(f"Cleaned up quiz in chat {chat_id}")
+    
+    async def _checkpoint_loop(self):
+        while True:
+            await asyncio.sleep(Config.CHECKPOINT_INTERVAL)
+            
+            try:
+                await self.checkpoint()
+            except Exception as e:
+                logger.error(f"Error checkpointing quiz runs: {e}")
+    
+    async def checkpoint(self):
+        async with self._checkpoint_lock:
+            await self._write_checkpoints()
+    
+    async def _write_checkpoints(self):
+        if not self._dirty_runs:
+            return
+        
+        dirty_runs, self._dirty_runs = self._dirty_runs, set()
+        checkpoints = []
+        taken = []
+        
+        for chat_id in dirty_runs:
+            quiz_data = self.active_quizzes.get(chat_id)
+            if quiz_data is None:
+                continue
+            
+            dirty_participants, quiz_data["dirty_participants"] = quiz_data["dirty_participants"], set()
+            new_polls, quiz_data["new_polls"] = quiz_data["new_polls"], {}
+            taken.append((chat_id, dirty_participants, new_polls))
+            
+            fields = {
+                "quiz_id": quiz_data["quiz_id"],
+                "current_question": quiz_data["current_question"],
+                "question_sent_at": quiz_data["question_sent_at"],
+                "paused": quiz_data["paused"]
+            }
+            
+            for user_id in dirty_participants:
+                participant = quiz_data["participants"][user_id]
+                fields[f"participants.{user_id}"] = {
+                    "first_name": participant.first_name,
+                    "correct": participant.correct,
+                    "wrong": participant.wrong,
+                    "answered": format(participant.answered, "x")
+                }
+            
+            for poll_id, poll in new_polls.items():
+                fields[f"polls.{poll_id}"] = poll
+            
+            checkpoints.append((chat_id, fields))
+        
+        try:
+            await self.runs.save_run_checkpoints(checkpoints)
+        except Exception:
+            for chat_id, dirty_participants, new_polls in taken:
+                quiz_data = self.active_quizzes.get(chat_id)
+                if quiz_data is not None:
+                    quiz_data["dirty_participants"] |= dirty_participants
+                    quiz_data["new_polls"].update(new_polls)
+                    self._dirty_runs.add(chat_id)
+            raise
+    
+    async def resume_runs(self, owns_chat=None):
+        for run in await self.runs.get_runs():
+            chat_id = run["_id"]
+            
+            if owns_chat is not None and not owns_chat(chat_id):
+                continue
+            
+            quiz = await self.db.get_quiz(run["quiz_id"])
+            
+            if not quiz or chat_id in self.active_quizzes:
+                await self.runs.delete_run(chat_id)
+                continue
+            
+            try:
+                quiz_data = self._new_run(run["quiz_id"], quiz)
+            except ValueError as e:
+                logger.error(f"Cannot resume quiz {run['quiz_id']} in chat {chat_id}: {e}")
+                await self.runs.delete_run(chat_id)
+                continue
+            
+            quiz_data["current_question"] = run.get("current_question", 0)
+            quiz_data["question_sent_at"] = run.get("question_sent_at")
+            quiz_data["paused"] = run.get("paused", False)
+            
+            for user_id, data in run.get("participants", {}).items():
+                participant = Participant(data["first_name"])
+                participant.correct = data["correct"]
+                participant.wrong = data["wrong"]
+                participant.answered = int(data["answered"], 16)
+                quiz_data["participants"][int(user_id)] = participant
+                if quiz_data["ranking"] is not None:
+                    quiz_data["ranking"].update(int(user_id), participant.correct)
+            
+            self.active_quizzes[chat_id] = quiz_data
+            
+            now = time.time()
+            time_per_question = quiz_data["time_per_question"]
+            sent_at = quiz_data["question_sent_at"]
+            
+            for poll_id, (question_index, correct_option) in run.get("polls", {}).items():
+                if question_index == quiz_data["current_question"] and sent_at is not None:
+                    self._register_poll(
+                        poll_id,
+                        PollRecord(chat_id, quiz_data["quiz_id"], question_index, correct_option),
+                        max(0, sent_at + time_per_question - now)
+                    )
+            
+            if sent_at is None:
+                delay = 0
+            else:
+                quiz_data["next_question"] = quiz_data["current_question"] + 1
+                delay = max(0, sent_at + self._next_question_delay(time_per_question) - now)
+            
+            self._schedule_question(chat_id, delay)
+            logger.info(
+                f"Resumed quiz {quiz_data['quiz_id']} in chat {chat_id} at question {quiz_data['next_question'] + 1}"
+            )
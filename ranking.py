@@ -0,0 +1,30 @@
+import bisect
+import itertools
+
+
+class Ranking:
+    __slots__ = ("_keys", "_entries", "_seq")
+    
+    def __init__(self):
+        # Sorted (-score, seq, user_id); seq breaks ties in favour of whoever got there first
+        self._keys = []
+        self._entries = {}
+        self._seq = itertools.count()
+    
+    def __len__(self):
+        return len(self._keys)
+    
+    def update(self, user_id: int, score: int):
+        old = self._entries.get(user_id)
+        
+        if old is not None:
+            if old[0] == -score:
+                return
+            del self._keys[bisect.bisect_left(self._keys, old)]
+        
+        key = (-score, next(self._seq), user_id)
+        bisect.insort(self._keys, key)
+        self._entries[user_id] = key
+    
+    def top(self, limit: int) -> list:
+        return [(user_id, -score) for score, _, user_id in self._keys[:limit]]
@@ -0,0 +1,146 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    __slots__ = ("deadline", "callback", "args")
+    
+    def __init__(self, deadline: float, callback, args: tuple):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+
+
+class Scheduler:
+    def __init__(self):
+        self._heap = []
+        self._jobs = {}
+        self._paused = {}
+        self._running = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.lateness = Histogram()
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def schedule(self, key, delay: float, callback, *args):
+        self._jobs.pop(key, None)
+        self._paused.pop(key, None)
+        
+        job = _Job(asyncio.get_running_loop().time() + max(0, delay), callback, args)
+        self._jobs[key] = job
+        heapq.heappush(self._heap, (job.deadline, next(self._seq), key, job))
+        
+        if self._heap[0][3] is job:
+            self._wakeup.set()
+    
+    def cancel(self, key, running: bool = True) -> bool:
+        # Heap entries are dropped lazily once their job is no longer in _jobs
+        found = self._jobs.pop(key, None) is not None
+        found = self._paused.pop(key, None) is not None or found
+        
+        task = self._running.get(key)
+        if running and task is not None and task is not asyncio.current_task():
+            task.cancel()
+            found = True
+        
+        return found
+    
+    def pause(self, key) -> bool:
+        job = self._jobs.pop(key, None)
+        if job is None:
+            return False
+        
+        job.deadline = max(0, job.deadline - asyncio.get_running_loop().time())
+        self._paused[key] = job
+        return True
+    
+    def resume(self, key) -> bool:
+        job = self._paused.pop(key, None)
+        if job is None:
+            return False
+        
+        self.schedule(key, job.deadline, job.callback, *job.args)
+        return True
+    
+    def is_scheduled(self, key) -> bool:
+        return key in self._jobs
+    
+    def is_paused(self, key) -> bool:
+        return key in self._paused
+    
+    def __len__(self):
+        return len(self._jobs)
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            while self._heap and self._jobs.get(self._heap[0][2]) is not self._heap[0][3]:
+                heapq.heappop(self._heap)
+            
+            self._wakeup.clear()
+            
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            
+            timeout = self._heap[0][0] - loop.time()
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            _, _, key, job = heapq.heappop(self._heap)
+            if self._jobs.get(key) is not job:
+                continue
+            
+            del self._jobs[key]
+            self.lateness.observe((loop.time() - job.deadline) * 1000)
+            self._fire(key, job)
+    
+    def _fire(self, key, job: _Job):
+        try:
+            result = job.callback(*job.args)
+        except Exception as e:
+            logger.error(f"Scheduled job {key} failed: {e}")
+            return
+        
+        if asyncio.iscoroutine(result):
+            task = asyncio.create_task(result)
+            self._running[key] = task
+            task.add_done_callback(lambda t, key=key: self._job_done(key, t))
+    
+    def _job_done(self, key, task: asyncio.Task):
+        if self._running.get(key) is task:
+            del self._running[key]
+        
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Scheduled job {key} failed: {task.exception()}")
+    
+    def stats(self) -> dict:
+        return {
+            "scheduled": len(self._jobs),
+            "paused": len(self._paused),
+            "running": len(self._running),
+            "lateness_ms": self.lateness.summary()
+        }
@@ -0,0 +1,332 @@
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import types
+import zlib
+import logging
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def shard_for(chat_id: int, shard_count: int) -> int:
+    return zlib.crc32(str(chat_id).encode()) % shard_count
+
+
+async def _send(writer: asyncio.StreamWriter, message: dict):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+class ShardRouter:
+    def __init__(self, shard_count: int, socket_path: str, factory=None):
+        self.shard_count = shard_count
+        self.socket_path = socket_path
+        # Builds each shard's QuizManager inside the shard process; must be picklable
+        self.factory = factory or create_shard_manager
+        self.poll_shards = {}
+        self._writers = {}
+        self._ready = {shard_id: asyncio.Event() for shard_id in range(shard_count)}
+        self._pending = {}
+        self._request_ids = itertools.count()
+        self._processes = []
+        self._server = None
+        self.dropped_answers = 0
+    
+    def start(self):
+        asyncio.create_task(self.listen())
+        
+        context = multiprocessing.get_context("spawn")
+        
+        for shard_id in range(self.shard_count):
+            process = context.Process(
+                target=run_shard, args=(shard_id, self.shard_count, self.socket_path, self.factory),
+                name=f"quiz-shard-{shard_id}", daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        
+        logger.info(f"Started {self.shard_count} quiz shards")
+    
+    async def listen(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        
+        self._server = await asyncio.start_unix_server(self._handle_shard, path=self.socket_path)
+    
+    async def _handle_shard(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        shard_id = None
+        
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                
+                message = json.loads(line)
+                kind = message["type"]
+                
+                if kind == "hello":
+                    shard_id = message["shard"]
+                    self._writers[shard_id] = writer
+                    self._ready[shard_id].set()
+                    logger.info(f"Shard {shard_id} connected")
+                elif kind == "poll_opened":
+                    self.poll_shards[message["poll_id"]] = shard_id
+                elif kind == "poll_closed":
+                    self.poll_shards.pop(message["poll_id"], None)
+                elif kind == "reply":
+                    future = self._pending.pop(message["id"], None)
+                    if future is not None and not future.done():
+                        if message.get("error"):
+                            future.set_exception(ValueError(message["error"]))
+                        else:
+                            future.set_result(message.get("result"))
+        finally:
+            if shard_id is not None:
+                logger.error(f"Shard {shard_id} disconnected")
+                self._writers.pop(shard_id, None)
+                self._ready[shard_id].clear()
+    
+    async def _request(self, shard_id: int, action: str, **params):
+        await asyncio.wait_for(self._ready[shard_id].wait(), Config.SHARD_TIMEOUT)
+        
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        
+        try:
+            await _send(self._writers[shard_id], {"type": "request", "id": request_id, "action": action, **params})
+            return await asyncio.wait_for(future, Config.SHARD_TIMEOUT)
+        finally:
+            self._pending.pop(request_id, None)
+    
+    def _owner(self, chat_id: int) -> int:
+        return shard_for(chat_id, self.shard_count)
+    
+    async def is_quiz_running(self, chat_id: int) -> bool:
+        return await self._request(self._owner(chat_id), "is_quiz_running", chat_id=chat_id)
+    
+    async def start_quiz(self, chat_id: int, quiz_id: str, quiz: dict, delay: float = 0):
+        # The owning shard loads the quiz through its own cache
+        await self._request(self._owner(chat_id), "start_quiz", chat_id=chat_id, quiz_id=quiz_id, delay=delay)
+    
+    async def cancel_quiz(self, chat_id: int):
+        await self._request(self._owner(chat_id), "cancel_quiz", chat_id=chat_id)
+    
+    async def pause_quiz(self, chat_id: int) -> bool:
+        return await self._request(self._owner(chat_id), "pause_quiz", chat_id=chat_id)
+    
+    async def resume_quiz(self, chat_id: int) -> bool:
+        return await self._request(self._owner(chat_id), "resume_quiz", chat_id=chat_id)
+    
+    async def get_quiz_summaries(self) -> dict:
+        replies = await asyncio.gather(
+            *(self._request(shard_id, "get_quiz_summaries") for shard_id in range(self.shard_count)),
+            return_exceptions=True
+        )
+        summaries = {}
+        
+        for shard_id, reply in enumerate(replies):
+            if isinstance(reply, Exception):
+                logger.error(f"Shard {shard_id} did not report status: {reply}")
+                continue
+            
+            summaries.update({int(chat_id): summary for chat_id, summary in reply.items()})
+        
+        return summaries
+    
+    async def cancel_quiz_runs(self, quiz_id: str, reason: str) -> int:
+        # A quiz can be running in chats owned by any shard
+        replies = await asyncio.gather(
+            *(self._request(shard_id, "cancel_quiz_runs", quiz_id=quiz_id, reason=reason)
+              for shard_id in range(self.shard_count)),
+            return_exceptions=True
+        )
+        cancelled = 0
+        
+        for shard_id, reply in enumerate(replies):
+            if isinstance(reply, Exception):
+                logger.error(f"Shard {shard_id} could not cancel runs of quiz {quiz_id}: {reply}")
+            else:
+                cancelled += reply
+        
+        return cancelled
+    
+    async def get_stats(self) -> dict:
+        replies = await asyncio.gather(
+            *(self._request(shard_id, "get_stats") for shard_id in range(self.shard_count)),
+            return_exceptions=True
+        )
+        
+        stats = {
+            "shards": self.shard_count,
+            "routed_polls": len(self.poll_shards),
+            "dropped_answers": self.dropped_answers
+        }
+        
+        for shard_id, reply in enumerate(replies):
+            stats[f"shard_{shard_id}"] = {"error": str(reply)} if isinstance(reply, Exception) else reply
+        
+        return stats
+    
+    async def resume_runs(self):
+        # Every shard resumes the checkpointed runs it owns when it starts
+        return
+    
+    def handle_answer(self, poll_answer) -> bool:
+        shard_id = self.poll_shards.get(poll_answer.poll_id)
+        writer = self._writers.get(shard_id)
+        
+        if writer is None:
+            self.dropped_answers += 1
+            return False
+        
+        writer.write(json.dumps({
+            "type": "answer",
+            "poll_id": poll_answer.poll_id,
+            "user_id": poll_answer.user.id,
+            "first_name": poll_answer.user.first_name,
+            "option_ids": list(poll_answer.option_ids)
+        }).encode() + b"\n")
+        return True
+
+
+class ShardWorker:
+    def __init__(self, shard_id: int, shard_count: int, quiz_manager, db):
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+        self.quiz_manager = quiz_manager
+        self.db = db
+        self.writer = None
+    
+    def owns_chat(self, chat_id: int) -> bool:
+        return shard_for(chat_id, self.shard_count) == self.shard_id
+    
+    def _notify(self, message: dict):
+        if self.writer is not None:
+            self.writer.write(json.dumps(message).encode() + b"\n")
+    
+    async def connect(self, socket_path: str):
+        for _ in range(50):
+            try:
+                reader, self.writer = await asyncio.open_unix_connection(socket_path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                await asyncio.sleep(0.2)
+        else:
+            raise ConnectionError(f"Shard {self.shard_id} could not reach router at {socket_path}")
+        
+        self.quiz_manager.on_poll_opened = lambda poll_id: self._notify({"type": "poll_opened", "poll_id": poll_id})
+        self.quiz_manager.on_poll_closed = lambda poll_id: self._notify({"type": "poll_closed", "poll_id": poll_id})
+        
+        await _send(self.writer, {"type": "hello", "shard": self.shard_id})
+        return reader
+    
+    async def serve(self, reader: asyncio.StreamReader):
+        while True:
+            line = await reader.readline()
+            if not line:
+                logger.error(f"Shard {self.shard_id} lost its router connection")
+                return
+            
+            message = json.loads(line)
+            
+            if message["type"] == "answer":
+                self.quiz_manager.handle_answer(types.SimpleNamespace(
+                    poll_id=message["poll_id"],
+                    user=types.SimpleNamespace(id=message["user_id"], first_name=message["first_name"]),
+                    option_ids=message["option_ids"]
+                ))
+            elif message["type"] == "request":
+                asyncio.create_task(self._handle_request(message))
+    
+    async def _handle_request(self, message: dict):
+        reply = {"type": "reply", "id": message["id"]}
+        
+        try:
+            reply["result"] = await self._dispatch(message)
+        except Exception as e:
+            reply["error"] = str(e)
+        
+        await _send(self.writer, reply)
+    
+    async def _dispatch(self, message: dict):
+        action = message["action"]
+        manager = self.quiz_manager
+        
+        if action == "get_quiz_summaries":
+            return await manager.get_quiz_summaries()
+        if action == "cancel_quiz_runs":
+            return await manager.cancel_quiz_runs(message["quiz_id"], message["reason"])
+        if action == "get_stats":
+            stats = await manager.get_stats()
+            stats["database"] = self.db.stats()
+            return stats
+        
+        chat_id = message["chat_id"]
+        
+        if action == "is_quiz_running":
+            return await manager.is_quiz_running(chat_id)
+        if action == "start_quiz":
+            quiz = await self.db.get_quiz(message["quiz_id"])
+            if not quiz:
+                raise ValueError("Quiz not found")
+            await manager.start_quiz(chat_id, message["quiz_id"], quiz, delay=message["delay"])
+            return True
+        if action == "cancel_quiz":
+            await manager.cancel_quiz(chat_id)
+            return True
+        if action == "pause_quiz":
+            return await manager.pause_quiz(chat_id)
+        if action == "resume_quiz":
+            return await manager.resume_quiz(chat_id)
+        
+        raise ValueError(f"Unknown shard action: {action}")
+
+
+async def create_shard_manager(shard_id: int, shard_count: int):
+    from pyrogram import Client
+    from database import Database
+    from quiz_manager import QuizManager
+    from state import create_state_store
+    
+    # The outbound rate limit is global to the bot, so split it between shards
+    Config.SEND_GLOBAL_RATE = Config.SEND_GLOBAL_RATE / shard_count
+    
+    app = Client(
+        f"quiz_bot_shard_{shard_id}",
+        api_id=Config.API_ID,
+        api_hash=Config.API_HASH,
+        bot_token=Config.BOT_TOKEN,
+        in_memory=True,
+        no_updates=True
+    )
+    db = Database()
+    
+    await db.connect()
+    db.start_health_check()
+    await app.start()
+    return QuizManager(app, db, create_state_store(db))
+
+
+async def serve_shard(shard_id: int, shard_count: int, socket_path: str, factory=None):
+    quiz_manager = await (factory or create_shard_manager)(shard_id, shard_count)
+    worker = ShardWorker(shard_id, shard_count, quiz_manager, quiz_manager.db)
+    
+    reader = await worker.connect(socket_path)
+    quiz_manager.start()
+    await quiz_manager.resume_runs(owns_chat=worker.owns_chat)
+    
+    logger.info(f"Shard {shard_id}/{shard_count} started")
+    await worker.serve(reader)
+
+
+def run_shard(shard_id: int, shard_count: int, socket_path: str, factory=None):
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - shard{shard_id} - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(serve_shard(shard_id, shard_count, socket_path, factory))
@@ -0,0 +1,30 @@
+import asyncio
+
+
+async def start_quiz_request(db, quiz_manager, quiz_id: str, chat_id: int, user_id: int,
+                             private: bool, delay: float) -> tuple:
+    # One attempt per user only applies in private chats, so groups skip the lookup
+    if private:
+        attempt_check = db.has_user_attempted(quiz_id, user_id)
+    else:
+        attempt_check = asyncio.sleep(0, result=False)
+    
+    quiz, is_running, has_attempted = await asyncio.gather(
+        db.get_quiz(quiz_id), quiz_manager.is_quiz_running(chat_id), attempt_check
+    )
+    
+    if not quiz:
+        return None, "❌ Quiz not found!"
+    
+    if is_running:
+        return None, "❌ A quiz is already running in this chat!"
+    
+    if has_attempted:
+        return None, "❌ You have already attempted this quiz!"
+    
+    try:
+        await quiz_manager.start_quiz(chat_id, quiz_id, quiz, delay=delay)
+    except ValueError as e:
+        return None, f"❌ **Quiz cannot be started:**\n{e}"
+    
+    return quiz, None
@@ -0,0 +1,294 @@
+import json
+import time
+from datetime import datetime, timedelta
+from pymongo import UpdateOne, DeleteOne
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StatePipeline:
+    def __init__(self, store):
+        self.store = store
+        self._ops = []
+    
+    def __len__(self):
+        return len(self._ops)
+    
+    def set(self, key: str, value, ttl: float = None):
+        self._ops.append(("set", key, (value, ttl)))
+        return self
+    
+    def delete(self, key: str):
+        self._ops.append(("delete", key, ()))
+        return self
+    
+    def hset(self, key: str, mapping: dict):
+        self._ops.append(("hset", key, (mapping,)))
+        return self
+    
+    def hdel(self, key: str, field: str):
+        self._ops.append(("hdel", key, (field,)))
+        return self
+    
+    def hincrby(self, key: str, field: str, amount: int = 1):
+        self._ops.append(("hincrby", key, (field, amount)))
+        return self
+    
+    async def execute(self):
+        if not self._ops:
+            return
+        
+        ops, self._ops = self._ops, []
+        await self.store.execute(ops)
+
+
+class MemoryStateStore:
+    def __init__(self):
+        self._values = {}
+        self._hashes = {}
+        self._expires = {}
+    
+    def pipeline(self) -> StatePipeline:
+        return StatePipeline(self)
+    
+    def _expired(self, key: str) -> bool:
+        expires_at = self._expires.get(key)
+        
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._delete(key)
+            return True
+        
+        return False
+    
+    def _set(self, key: str, value, ttl: float = None):
+        self._values[key] = value
+        
+        if ttl:
+            self._expires[key] = time.monotonic() + ttl
+        else:
+            self._expires.pop(key, None)
+    
+    def _delete(self, key: str):
+        self._values.pop(key, None)
+        self._hashes.pop(key, None)
+        self._expires.pop(key, None)
+    
+    def _hset(self, key: str, mapping: dict):
+        self._hashes.setdefault(key, {}).update(mapping)
+    
+    def _hdel(self, key: str, field: str):
+        self._hashes.get(key, {}).pop(field, None)
+    
+    def _hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        fields = self._hashes.setdefault(key, {})
+        fields[field] = fields.get(field, 0) + amount
+        return fields[field]
+    
+    async def get(self, key: str, default=None):
+        if self._expired(key):
+            return default
+        return self._values.get(key, default)
+    
+    async def set(self, key: str, value, ttl: float = None):
+        self._set(key, value, ttl)
+    
+    async def delete(self, key: str):
+        self._delete(key)
+    
+    async def hgetall(self, key: str) -> dict:
+        return dict(self._hashes.get(key, {}))
+    
+    async def hset(self, key: str, mapping: dict):
+        self._hset(key, mapping)
+    
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        return self._hincrby(key, field, amount)
+    
+    async def execute(self, ops: list):
+        # Nothing awaits between operations, so a batch applies atomically
+        for op, key, args in ops:
+            getattr(self, f"_{op}")(key, *args)
+
+
+class RedisStateStore:
+    def __init__(self, client):
+        self.client = client
+    
+    def pipeline(self) -> StatePipeline:
+        return StatePipeline(self)
+    
+    async def get(self, key: str, default=None):
+        value = await self.client.get(key)
+        return default if value is None else json.loads(value)
+    
+    async def set(self, key: str, value, ttl: float = None):
+        await self.client.set(key, json.dumps(value), ex=int(ttl) if ttl else None)
+    
+    async def delete(self, key: str):
+        await self.client.delete(key)
+    
+    async def hgetall(self, key: str) -> dict:
+        return await self.client.hgetall(key)
+    
+    async def hset(self, key: str, mapping: dict):
+        await self.client.hset(key, mapping=mapping)
+    
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        return await self.client.hincrby(key, field, amount)
+    
+    async def execute(self, ops: list):
+        async with self.client.pipeline(transaction=True) as pipe:
+            for op, key, args in ops:
+                if op == "set":
+                    value, ttl = args
+                    pipe.set(key, json.dumps(value), ex=int(ttl) if ttl else None)
+                elif op == "delete":
+                    pipe.delete(key)
+                elif op == "hset":
+                    pipe.hset(key, mapping=args[0])
+                elif op == "hdel":
+                    pipe.hdel(key, *args)
+                elif op == "hincrby":
+                    pipe.hincrby(key, *args)
+            
+            await pipe.execute()
+
+
+class MongoStateStore:
+    def __init__(self, db):
+        self.db = db
+    
+    @property
+    def collection(self):
+        return self.db.bot_state
+    
+    def pipeline(self) -> StatePipeline:
+        return StatePipeline(self)
+    
+    @staticmethod
+    def _expiry(ttl: float = None):
+        return datetime.utcnow() + timedelta(seconds=ttl) if ttl else None
+    
+    def _request(self, op: str, key: str, args: tuple):
+        if op == "set":
+            value, ttl = args
+            return UpdateOne(
+                {"_id": key}, {"$set": {"value": value, "expires_at": self._expiry(ttl)}}, upsert=True
+            )
+        if op == "delete":
+            return DeleteOne({"_id": key})
+        if op == "hset":
+            return UpdateOne(
+                {"_id": key}, {"$set": {f"fields.{field}": value for field, value in args[0].items()}}, upsert=True
+            )
+        if op == "hdel":
+            return UpdateOne({"_id": key}, {"$unset": {f"fields.{args[0]}": ""}})
+        if op == "hincrby":
+            field, amount = args
+            return UpdateOne({"_id": key}, {"$inc": {f"fields.{field}": amount}}, upsert=True)
+        
+        raise ValueError(f"Unknown state operation: {op}")
+    
+    async def get(self, key: str, default=None):
+        doc = await self.collection.find_one({"_id": key}, {"value": 1, "expires_at": 1})
+        
+        # The TTL monitor only runs once a minute, so check expiry on read as well
+        if not doc or "value" not in doc or (doc.get("expires_at") and doc["expires_at"] <= datetime.utcnow()):
+            return default
+        return doc["value"]
+    
+    async def set(self, key: str, value, ttl: float = None):
+        await self.collection.bulk_write([self._request("set", key, (value, ttl))])
+    
+    async def delete(self, key: str):
+        await self.collection.delete_one({"_id": key})
+    
+    async def hgetall(self, key: str) -> dict:
+        doc = await self.collection.find_one({"_id": key}, {"fields": 1})
+        return doc.get("fields", {}) if doc else {}
+    
+    async def hset(self, key: str, mapping: dict):
+        await self.collection.bulk_write([self._request("hset", key, (mapping,))])
+    
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        doc = await self.collection.find_one_and_update(
+            {"_id": key}, {"$inc": {f"fields.{field}": amount}},
+            upsert=True, return_document=True, projection={f"fields.{field}": 1}
+        )
+        return doc["fields"][field]
+    
+    async def execute(self, ops: list):
+        await self.collection.bulk_write([self._request(op, key, args) for op, key, args in ops], ordered=True)
+
+
+class RunCheckpointStore:
+    # Keeps quiz run checkpoints in a shared state store, with the same
+    # interface as the quiz_runs methods on Database
+    INDEX_KEY = "runs"
+    
+    def __init__(self, state):
+        self.state = state
+    
+    @staticmethod
+    def _run_key(chat_id: int) -> str:
+        return f"run:{chat_id}"
+    
+    async def save_run_checkpoints(self, checkpoints: list):
+        if not checkpoints:
+            return
+        
+        pipe = self.state.pipeline()
+        
+        for chat_id, fields in checkpoints:
+            # Dotted paths would nest in MongoDB, so flatten them with ':' instead
+            pipe.hset(self._run_key(chat_id), {
+                name.replace(".", ":"): json.dumps(value) for name, value in fields.items()
+            })
+            pipe.hset(self.INDEX_KEY, {str(chat_id): fields["quiz_id"]})
+        
+        await pipe.execute()
+    
+    async def get_runs(self) -> list:
+        runs = []
+        
+        for chat_id in await self.state.hgetall(self.INDEX_KEY):
+            run = {"_id": int(chat_id)}
+            
+            for name, value in (await self.state.hgetall(self._run_key(chat_id))).items():
+                group, _, field = name.partition(":")
+                if field:
+                    run.setdefault(group, {})[field] = json.loads(value)
+                else:
+                    run[name] = json.loads(value)
+            
+            if "quiz_id" in run:
+                runs.append(run)
+            else:
+                await self.delete_run(int(chat_id))
+        
+        return runs
+    
+    async def delete_run(self, chat_id: int):
+        await self.state.pipeline().delete(self._run_key(chat_id)).hdel(self.INDEX_KEY, str(chat_id)).execute()
+
+
+def create_state_store(db):
+    backend = Config.STATE_BACKEND
+    
+    if backend == "memory":
+        return MemoryStateStore()
+    
+    if backend == "mongo":
+        return MongoStateStore(db)
+    
+    if backend == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ValueError("STATE_BACKEND=redis requires the redis package")
+        
+        return RedisStateStore(redis.from_url(Config.REDIS_URL, decode_responses=True))
+    
+    raise ValueError(f"Unknown STATE_BACKEND: {backend}")
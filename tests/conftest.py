@@ -0,0 +1,319 @@
+import asyncio
+import itertools
+import os
+import sys
+import time
+import types
+from collections import Counter
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from state import MemoryStateStore, StatePipeline
+
+_reports = []
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-slow", action="store_true", help="also run soak tests and benchmarks")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: soak test or benchmark, only run with --run-slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-slow"):
+        return
+    
+    skip = pytest.mark.skip(reason="needs --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _reports:
+        terminalreporter.section("measurements")
+        for line in _reports:
+            terminalreporter.write_line(line)
+
+
+@pytest.fixture
+def report(request):
+    # Measurements are printed together at the end of the run instead of interleaved with progress
+    return lambda text: _reports.append(f"{request.node.name}: {text}")
+
+
+class FakeClient:
+    def __init__(self, latency: float = 0):
+        self.calls = []
+        # Exceptions to raise, in order, the next times a method is called
+        self.failures = {}
+        self.latency = latency
+        self._ids = itertools.count(1)
+    
+    async def _call(self, method: str, chat_id: int, kwargs: dict):
+        self.calls.append((method, chat_id, kwargs))
+        
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        
+        errors = self.failures.get(method)
+        if errors:
+            raise errors.pop(0)
+        
+        message_id = next(self._ids)
+        return types.SimpleNamespace(
+            id=message_id,
+            chat=types.SimpleNamespace(id=chat_id),
+            poll=types.SimpleNamespace(id=f"poll-{message_id}") if method == "send_poll" else None
+        )
+    
+    async def send_poll(self, chat_id: int, **kwargs):
+        return await self._call("send_poll", chat_id, kwargs)
+    
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        return await self._call("send_message", chat_id, {"text": text, **kwargs})
+    
+    async def edit_message_text(self, chat_id: int, **kwargs):
+        return await self._call("edit_message_text", chat_id, kwargs)
+    
+    async def pin_chat_message(self, chat_id: int, **kwargs):
+        return await self._call("pin_chat_message", chat_id, kwargs)
+    
+    def methods(self) -> list:
+        return [method for method, _, _ in self.calls]
+
+
+class LocalSharedStore:
+    # Stands in for a shared backend: behaves like memory, but isn't a MemoryStateStore
+    def __init__(self, blocked: bool = False):
+        self.store = MemoryStateStore()
+        self.blocked = blocked
+        self.executed = 0
+    
+    def pipeline(self):
+        return StatePipeline(self)
+    
+    async def execute(self, ops: list):
+        if self.blocked:
+            await asyncio.Event().wait()
+        self.executed += 1
+        await self.store.execute(ops)
+    
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for field, condition in (query or {}).items():
+        value = doc.get(field)
+        
+        if isinstance(condition, dict):
+            if "$exists" in condition and (field in doc) != condition["$exists"]:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$gte" in condition and (value is None or value < condition["$gte"]):
+                return False
+        elif value != condition:
+            return False
+    
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+    
+    def sort(self, key, direction=1):
+        return FakeCursor(sorted(self.docs, key=lambda doc: doc.get(key), reverse=direction < 0))
+    
+    def limit(self, count: int):
+        return FakeCursor(self.docs[:count] if count else self.docs)
+    
+    def batch_size(self, size: int):
+        return self
+    
+    async def to_list(self, length=None):
+        return list(self.docs)
+    
+    def __aiter__(self):
+        return self._iterate()
+    
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeCollection:
+    # Just enough of a Motor collection for the queries Database makes; every call
+    # counts as one round trip and can be slowed down to stand in for the network
+    def __init__(self, docs=(), name: str = "fake", latency: float = 0, database=None):
+        self.docs = [dict(doc) for doc in docs]
+        self.name = name
+        self.latency = latency
+        self.database = database
+        self.indexes = []
+        self.calls = Counter()
+        self.requests = []
+        self.distinct_queries = []
+        self._ids = itertools.count(1)
+    
+    async def _round_trip(self, op: str):
+        self.calls[op] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+    
+    def _store(self, doc: dict):
+        doc.setdefault("_id", next(self._ids))
+        self.docs.append(dict(doc))
+    
+    async def insert_one(self, doc: dict):
+        await self._round_trip("insert_one")
+        self._store(doc)
+        return types.SimpleNamespace(inserted_id=doc["_id"])
+    
+    async def insert_many(self, docs: list, ordered: bool = True):
+        await self._round_trip("insert_many")
+        for doc in docs:
+            self._store(doc)
+        return types.SimpleNamespace(inserted_ids=[doc["_id"] for doc in docs])
+    
+    async def bulk_write(self, requests: list, ordered: bool = True):
+        await self._round_trip("bulk_write")
+        self.requests.extend(requests)
+    
+    async def distinct(self, field: str, query: dict = None):
+        await self._round_trip("distinct")
+        self.distinct_queries.append(query)
+        return list(dict.fromkeys(doc[field] for doc in self.docs if matches(doc, query)))
+    
+    async def find_one(self, query: dict, projection=None):
+        await self._round_trip("find_one")
+        return next((doc for doc in self.docs if matches(doc, query)), None)
+    
+    def find(self, query: dict = None, projection=None):
+        self.calls["find"] += 1
+        return FakeCursor([doc for doc in self.docs if matches(doc, query)])
+    
+    def aggregate(self, pipeline: list):
+        self.calls["aggregate"] += 1
+        return FakeCursor([])
+    
+    async def count_documents(self, query: dict, limit: int = 0):
+        await self._round_trip("count_documents")
+        count = sum(1 for doc in self.docs if matches(doc, query))
+        return min(count, limit) if limit else count
+    
+    async def replace_one(self, query: dict, doc: dict, upsert: bool = False):
+        await self._round_trip("replace_one")
+        self.docs = [existing for existing in self.docs if not matches(existing, query)]
+        self.docs.append({**doc, **{field: value for field, value in query.items() if field == "_id"}})
+    
+    async def delete_many(self, query: dict):
+        await self._round_trip("delete_many")
+        kept = [doc for doc in self.docs if not matches(doc, query)]
+        deleted = len(self.docs) - len(kept)
+        self.docs = kept
+        return types.SimpleNamespace(deleted_count=deleted)
+    
+    async def create_index(self, keys: list, **options):
+        await self._round_trip("create_index")
+        self.indexes.append(keys)
+        return "_".join(f"{field}_{direction}" for field, direction in keys)
+    
+    async def drop(self):
+        await self._round_trip("drop")
+        self.docs = []
+        self.indexes = []
+    
+    async def rename(self, target: str, dropTarget: bool = False):
+        await self._round_trip("rename")
+        # The target's documents and indexes are replaced by this collection's
+        self.database.collections[target] = self
+        self.database.collections.pop(self.name, None)
+        self.name = target
+    
+    async def delete_one(self, query: dict):
+        await self._round_trip("delete_one")
+        for doc in self.docs:
+            if matches(doc, query):
+                self.docs.remove(doc)
+                return types.SimpleNamespace(deleted_count=1)
+        return types.SimpleNamespace(deleted_count=0)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {}
+    
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(name=name, database=self)
+        return self.collections[name]
+    
+    def __getattr__(self, name: str) -> FakeCollection:
+        return self[name]
+
+
+def make_fake_db(**docs) -> Database:
+    db = Database()
+    db.db = FakeDatabase()
+    
+    for name in ("quizzes", "results", "questions", "quiz_runs", "bot_state", "user_stats", "quiz_stats", "leaderboards"):
+        collection = db.db[name]
+        collection.docs = [dict(doc) for doc in docs.get(name, ())]
+        setattr(db, name, collection)
+    
+    return db
+
+
+def poll_answer(poll_id: str, user_id: int, option: int, first_name: str = None):
+    return types.SimpleNamespace(
+        poll_id=poll_id,
+        user=types.SimpleNamespace(id=user_id, first_name=first_name or f"user{user_id}"),
+        option_ids=[option]
+    )
+
+
+async def wait_for(predicate, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for condition")
+        await asyncio.sleep(0.001)
+
+
+def make_quiz(count: int = 3, time_per_question: int = 30) -> dict:
+    return {
+        "name": "Load test",
+        "time_per_question": time_per_question,
+        "questions": [
+            {
+                "question": f"Question number {idx}",
+                "option_a": "A",
+                "option_b": "B",
+                "option_c": "C",
+                "option_d": "D",
+                "correct_option": idx % 4,
+                "explanation": ""
+            }
+            for idx in range(count)
+        ]
+    }
+
+
+async def stop_manager(quiz_manager):
+    await quiz_manager.answer_queue.stop()
+    await quiz_manager.scheduler.stop()
+    await quiz_manager.dispatcher.stop()
+    quiz_manager._checkpoint_task.cancel()
+
+
+@pytest.fixture
+def fake_client():
+    return FakeClient()
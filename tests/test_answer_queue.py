@@ -0,0 +1,155 @@
+import asyncio
+import time
+from answer_queue import AnswerQueue
+from database import Database
+from quiz_manager import QuizManager
+from conftest import poll_answer, wait_for, make_quiz, stop_manager
+
+
+def test_batches_group_answers_by_poll():
+    async def scenario():
+        batches = []
+        
+        async def handler(poll_id, answers):
+            batches.append((poll_id, [answer.user.id for answer in answers]))
+        
+        queue = AnswerQueue(handler, maxsize=100, batch_size=500)
+        
+        for user_id in range(6):
+            queue.put(poll_answer("a" if user_id % 2 else "b", user_id, 0))
+        
+        queue.start()
+        await wait_for(lambda: queue.processed == 6)
+        await queue.stop()
+        
+        assert sorted(batches) == [("a", [1, 3, 5]), ("b", [0, 2, 4])]
+        assert queue.batches == 1
+    
+    asyncio.run(scenario())
+
+
+def test_batch_size_caps_each_drain():
+    async def scenario():
+        sizes = []
+        
+        async def handler(poll_id, answers):
+            sizes.append(len(answers))
+        
+        queue = AnswerQueue(handler, maxsize=100, batch_size=4)
+        
+        for user_id in range(10):
+            queue.put(poll_answer("a", user_id, 0))
+        
+        queue.start()
+        await wait_for(lambda: queue.processed == 10)
+        await queue.stop()
+        
+        assert sizes == [4, 4, 2]
+        assert queue.stats()["batches"] == 3
+    
+    asyncio.run(scenario())
+
+
+def test_full_queue_drops_and_counts():
+    async def scenario():
+        async def handler(poll_id, answers):
+            pass
+        
+        queue = AnswerQueue(handler, maxsize=3, batch_size=10)
+        accepted = [queue.put(poll_answer("a", user_id, 0)) for user_id in range(5)]
+        
+        assert accepted == [True, True, True, False, False]
+        assert queue.stats()["dropped"] == 2
+        assert queue.stats()["depth"] == 3
+    
+    asyncio.run(scenario())
+
+
+def test_handler_error_does_not_stop_the_consumer():
+    async def scenario():
+        seen = []
+        
+        async def handler(poll_id, answers):
+            if poll_id == "bad":
+                raise RuntimeError("boom")
+            seen.extend(answer.user.id for answer in answers)
+        
+        queue = AnswerQueue(handler, maxsize=100, batch_size=1)
+        queue.put(poll_answer("bad", 1, 0))
+        queue.put(poll_answer("good", 2, 0))
+        
+        queue.start()
+        await wait_for(lambda: queue.processed == 2)
+        await queue.stop()
+        
+        assert seen == [2]
+    
+    asyncio.run(scenario())
+
+
+def test_quiz_manager_scores_100k_answers_per_minute(fake_client):
+    # Load generator: 100k answers to one poll, fed in bursts the way Telegram delivers them
+    answers = 100_000
+    
+    async def scenario():
+        quiz_manager = QuizManager(fake_client, Database())
+        quiz_manager.start()
+        chat_id = -1001
+        
+        await quiz_manager.start_quiz(chat_id, "quiz-1", make_quiz())
+        await wait_for(lambda: quiz_manager.poll_mapping)
+        poll_id = next(iter(quiz_manager.poll_mapping))
+        correct_option = quiz_manager.poll_mapping[poll_id].correct_option
+        
+        started = time.monotonic()
+        
+        for user_id in range(answers):
+            quiz_manager.handle_answer(poll_answer(poll_id, user_id, correct_option if user_id % 2 else 3))
+            if user_id % 1000 == 999:
+                await asyncio.sleep(0)
+        
+        await wait_for(lambda: quiz_manager.answer_queue.processed == answers, timeout=60)
+        elapsed = time.monotonic() - started
+        
+        quiz_data = quiz_manager.active_quizzes[chat_id]
+        leader = quiz_manager.get_leaderboard(chat_id, 1)[0]
+        stats = quiz_manager.answer_queue.stats()
+        await stop_manager(quiz_manager)
+        
+        assert elapsed < 60
+        assert stats["dropped"] == 0
+        assert len(quiz_data["participants"]) == answers
+        assert sum(participant.correct for participant in quiz_data["participants"].values()) == answers // 2
+        assert (leader["user_id"], leader["correct"]) == (1, 1)
+    
+    asyncio.run(scenario())
+
+
+def test_duplicate_answers_count_once(fake_client):
+    async def scenario():
+        quiz_manager = QuizManager(fake_client, Database())
+        quiz_manager.start()
+        chat_id = -1002
+        
+        await quiz_manager.start_quiz(chat_id, "quiz-2", make_quiz())
+        await wait_for(lambda: quiz_manager.poll_mapping)
+        poll_id = next(iter(quiz_manager.poll_mapping))
+        correct_option = quiz_manager.poll_mapping[poll_id].correct_option
+        
+        for _ in range(3):
+            quiz_manager.handle_answer(poll_answer(poll_id, 7, correct_option))
+        
+        await wait_for(lambda: quiz_manager.answer_queue.processed == 3)
+        participant = quiz_manager.active_quizzes[chat_id]["participants"][7]
+        await stop_manager(quiz_manager)
+        
+        assert (participant.correct, participant.wrong) == (1, 0)
+    
+    asyncio.run(scenario())
+
+
+def test_answers_to_unknown_polls_are_ignored(fake_client):
+    quiz_manager = QuizManager(fake_client, Database())
+    
+    assert quiz_manager.handle_answer(poll_answer("missing", 1, 0)) is False
+    assert quiz_manager.answer_queue.stats()["depth"] == 0
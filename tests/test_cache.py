@@ -0,0 +1,31 @@
+import time
+from cache import TTLCache
+
+
+def test_entries_read_before_expiring_are_still_purged():
+    expired = []
+    cache = TTLCache(maxsize=10, ttl=0.05, on_evict=lambda key, value, was_expired: expired.append(key))
+    cache.put("read", 1)
+    time.sleep(0.03)
+    cache.put("fresh", 2)
+    
+    # Reading moves an entry behind newer ones in use order, but not in expiry order
+    assert cache.get("read") == 1
+    time.sleep(0.03)
+    
+    assert cache.purge_expired() == 1
+    assert expired == ["read"]
+    assert len(cache) == 1 and "fresh" in cache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.purge_expired() == 0
@@ -0,0 +1,128 @@
+import asyncio
+import gc
+import time
+import tracemalloc
+import pytest
+from conversations import ConversationStore, ConversationTooLarge
+from state import MemoryStateStore
+from conftest import LocalSharedStore
+
+
+def session(idx: int) -> dict:
+    return {
+        "step": "awaiting_name",
+        "questions": [{"question": f"Abandoned question {idx}", "option_a": "A", "correct_option": 0}]
+    }
+
+
+def test_memory_sessions_expire_with_a_marker():
+    async def scenario():
+        conversations = ConversationStore(MemoryStateStore(), maxsize=10, ttl=0.05, max_bytes=1024)
+        await conversations.set(1, session(1))
+        
+        assert await conversations.get(1) == session(1)
+        await asyncio.sleep(0.06)
+        
+        assert await conversations.get(1) is None
+        assert conversations.is_expired(1)
+        assert not conversations.is_expired(2)
+    
+    asyncio.run(scenario())
+
+
+def test_shared_sessions_expire_with_a_marker():
+    async def scenario():
+        conversations = ConversationStore(LocalSharedStore(), maxsize=10, ttl=0.05, max_bytes=1024)
+        await conversations.set(1, session(1))
+        await conversations.set(2, session(2))
+        await conversations.delete(2)
+        
+        assert await conversations.get(1) == session(1)
+        await asyncio.sleep(0.06)
+        
+        assert await conversations.get(1) is None
+        assert conversations.is_expired(1)
+        # Finished sessions and users who never started get no expiry reply
+        assert await conversations.get(2) is None and not conversations.is_expired(2)
+        assert await conversations.get(3) is None and not conversations.is_expired(3)
+    
+    asyncio.run(scenario())
+
+
+def test_shared_session_markers_are_bounded():
+    async def scenario():
+        conversations = ConversationStore(LocalSharedStore(), maxsize=100, ttl=60, max_bytes=1024)
+        
+        for user_id in range(10_000):
+            await conversations.set(user_id, session(user_id))
+        
+        assert conversations.stats()["tracked_sessions"] == 100
+    
+    asyncio.run(scenario())
+
+
+def test_a_new_session_clears_the_expired_marker():
+    async def scenario():
+        conversations = ConversationStore(MemoryStateStore(), maxsize=1, ttl=60, max_bytes=1024)
+        await conversations.set(1, session(1))
+        await conversations.set(2, session(2))
+        
+        assert conversations.is_expired(1)
+        await conversations.set(1, session(1))
+        assert not conversations.is_expired(1)
+    
+    asyncio.run(scenario())
+
+
+def test_oversized_sessions_are_rejected():
+    async def scenario():
+        conversations = ConversationStore(MemoryStateStore(), maxsize=10, ttl=60, max_bytes=100)
+        
+        with pytest.raises(ConversationTooLarge):
+            await conversations.set(1, {"questions": ["x" * 200]})
+        
+        assert await conversations.get(1) is None
+        assert conversations.stats()["rejected"] == 1
+    
+    asyncio.run(scenario())
+
+
+@pytest.mark.slow
+def test_memory_stays_flat_over_1m_abandoned_sessions(report):
+    # Soak: a million users start /createquiz and never come back
+    sessions = 1_000_000
+    maxsize = 10_000
+    
+    async def scenario():
+        conversations = ConversationStore(MemoryStateStore(), maxsize=maxsize, ttl=3600, max_bytes=64 * 1024)
+        samples = {}
+        started = time.monotonic()
+        
+        try:
+            for user_id in range(sessions):
+                await conversations.set(user_id, session(user_id))
+                
+                # The caches turn over every 10k sessions, so by each sample
+                # everything they hold was allocated while traced
+                if user_id + 1 == 850_000:
+                    tracemalloc.start()
+                elif user_id + 1 > 850_000 and (user_id + 1) % 50_000 == 0:
+                    gc.collect()
+                    samples[user_id + 1] = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        
+        stats = conversations.stats()
+        elapsed = time.monotonic() - started
+        report(f"{sessions} sessions in {elapsed:.1f}s, traced memory at "
+               + ", ".join(f"{count // 1000}k: {size // 1024}KB" for count, size in samples.items()))
+        
+        assert stats["size"] == maxsize
+        assert stats["evictions"] == sessions - maxsize
+        assert len(conversations._sizes) == maxsize
+        assert len(conversations._expired) == maxsize
+        assert stats["bytes"] == sum(conversations._sizes.values())
+        # Memory must not keep growing with new sessions once the caches are full
+        assert max(samples.values()) < samples[900_000] * 1.05
+    
+    asyncio.run(scenario())
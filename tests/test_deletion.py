@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime, timedelta
+from config import Config
+from database import Database
+from conftest import make_fake_db
+
+
+def make_db(quizzes: list, results: list = ()) -> Database:
+    return make_fake_db(quizzes=quizzes, results=results)
+
+
+def queue(db: Database, quiz_id: str, user_id: int):
+    db.queue_result(quiz_id, -1, user_id, "Ada", 1, 0, 1, 100.0)
+
+
+def test_flush_drops_results_for_deleted_quizzes():
+    async def scenario():
+        db = make_db([
+            {"quiz_id": "live"},
+            {"quiz_id": "deleted", "deleted_at": datetime.utcnow()}
+        ])
+        queue(db, "live", 1)
+        queue(db, "deleted", 2)
+        queue(db, "reaped", 3)
+        
+        saved = await db.flush_results()
+        
+        assert saved == 1
+        assert [doc["quiz_id"] for doc in db.results.docs] == ["live"]
+        assert db._pending_results == []
+    
+    asyncio.run(scenario())
+
+
+def test_reaper_keeps_a_fresh_tombstone_for_another_pass(monkeypatch):
+    monkeypatch.setattr(Config, "REAPER_PAUSE", 0)
+    
+    async def scenario():
+        db = make_db(
+            [{"quiz_id": "gone", "deleted_at": datetime.utcnow()}],
+            [{"_id": idx, "quiz_id": "gone"} for idx in range(5)]
+        )
+        
+        assert await db.reap_quiz("gone") == 5
+        assert db.results.docs == []
+        assert await db.quizzes.find_one({"quiz_id": "gone"}) is not None
+    
+    asyncio.run(scenario())
+
+
+def test_reaper_removes_late_results_before_dropping_the_tombstone(monkeypatch):
+    monkeypatch.setattr(Config, "REAPER_PAUSE", 0)
+    
+    async def scenario():
+        deleted_at = datetime.utcnow() - Database._insert_window() - timedelta(seconds=1)
+        db = make_db([{"quiz_id": "gone", "deleted_at": deleted_at}], [{"_id": 1, "quiz_id": "gone"}])
+        
+        assert await db.reap_quiz("gone") == 1
+        
+        assert db.results.docs == []
+        assert await db.quizzes.find_one({"quiz_id": "gone"}) is None
+    
+    asyncio.run(scenario())
@@ -0,0 +1,128 @@
+import asyncio
+import time
+import pytest
+from pyrogram.errors import FloodWait
+from config import Config
+from dispatcher import SendDispatcher, PRIORITY_LEADERBOARD
+from conftest import wait_for
+
+GROUP_CHAT = -1001
+OTHER_GROUP_CHAT = -1002
+
+
+def test_polls_are_sent_before_leaderboards(fake_client):
+    async def scenario():
+        dispatcher = SendDispatcher(fake_client)
+        
+        leaderboard = dispatcher.send_message(GROUP_CHAT, "standings", priority=PRIORITY_LEADERBOARD)
+        poll = dispatcher.send_poll(GROUP_CHAT, question="Next question?")
+        dispatcher.start()
+        await asyncio.gather(leaderboard, poll)
+        await dispatcher.stop()
+        
+        assert fake_client.methods() == ["send_poll", "send_message"]
+    
+    asyncio.run(scenario())
+
+
+def test_flood_wait_reschedules_the_send(fake_client):
+    async def scenario():
+        fake_client.failures["send_poll"] = [FloodWait(value=1)]
+        dispatcher = SendDispatcher(fake_client)
+        dispatcher.start()
+        
+        started = time.monotonic()
+        message = await dispatcher.send_poll(GROUP_CHAT, question="Next question?")
+        elapsed = time.monotonic() - started
+        await dispatcher.stop()
+        
+        assert message.poll is not None
+        assert fake_client.methods() == ["send_poll", "send_poll"]
+        assert elapsed >= 1
+        assert dispatcher.stats()["flood_waits"] == 1
+        assert dispatcher.stats()["failures"] == 0
+    
+    asyncio.run(scenario())
+
+
+def test_flood_wait_blocks_only_that_chat(fake_client):
+    async def scenario():
+        fake_client.failures["send_message"] = [FloodWait(value=1)]
+        dispatcher = SendDispatcher(fake_client)
+        dispatcher.start()
+        
+        blocked = asyncio.ensure_future(dispatcher.send_message(GROUP_CHAT, "first"))
+        await wait_for(lambda: dispatcher.flood_waits == 1)
+        
+        same_chat = asyncio.ensure_future(dispatcher.send_message(GROUP_CHAT, "second"))
+        await dispatcher.send_message(OTHER_GROUP_CHAT, "elsewhere")
+        
+        assert not blocked.done() and not same_chat.done()
+        assert dispatcher.chat_buckets[GROUP_CHAT].blocked_until > time.monotonic()
+        
+        await asyncio.gather(blocked, same_chat)
+        await dispatcher.stop()
+        
+        sent = [(chat_id, kwargs["text"]) for _, chat_id, kwargs in fake_client.calls]
+        assert sent == [
+            (GROUP_CHAT, "first"),
+            (OTHER_GROUP_CHAT, "elsewhere"),
+            (GROUP_CHAT, "first"),
+            (GROUP_CHAT, "second")
+        ]
+    
+    asyncio.run(scenario())
+
+
+def test_flood_wait_is_raised_after_max_attempts(fake_client, monkeypatch):
+    monkeypatch.setattr(Config, "SEND_MAX_ATTEMPTS", 3)
+    
+    async def scenario():
+        fake_client.failures["send_poll"] = [FloodWait(value=0) for _ in range(5)]
+        dispatcher = SendDispatcher(fake_client)
+        dispatcher.start()
+        
+        with pytest.raises(FloodWait):
+            await dispatcher.send_poll(GROUP_CHAT, question="Next question?")
+        await dispatcher.stop()
+        
+        assert fake_client.methods() == ["send_poll"] * 3
+        assert dispatcher.stats()["flood_waits"] == 3
+        assert dispatcher.stats()["failures"] == 1
+    
+    asyncio.run(scenario())
+
+
+def test_other_errors_are_raised_without_retrying(fake_client):
+    async def scenario():
+        fake_client.failures["send_message"] = [RuntimeError("chat not found")]
+        dispatcher = SendDispatcher(fake_client)
+        dispatcher.start()
+        
+        with pytest.raises(RuntimeError):
+            await dispatcher.send_message(GROUP_CHAT, "hello")
+        await dispatcher.stop()
+        
+        assert fake_client.methods() == ["send_message"]
+        assert dispatcher.stats()["failures"] == 1
+    
+    asyncio.run(scenario())
+
+
+def test_group_burst_limits_sends_per_chat(fake_client, monkeypatch):
+    monkeypatch.setattr(Config, "SEND_GROUP_BURST", 2)
+    
+    async def scenario():
+        dispatcher = SendDispatcher(fake_client)
+        dispatcher.start()
+        
+        sends = [asyncio.ensure_future(dispatcher.send_message(GROUP_CHAT, f"message {idx}")) for idx in range(3)]
+        await asyncio.sleep(0.1)
+        
+        assert [send.done() for send in sends] == [True, True, False]
+        assert dispatcher.stats()["delayed"] == 1
+        
+        await dispatcher.stop()
+        sends[2].cancel()
+    
+    asyncio.run(scenario())
@@ -0,0 +1,94 @@
+import asyncio
+import io
+import json
+import time
+import tracemalloc
+from datetime import datetime
+import pytest
+from export import write_results, EXPORT_FIELDS
+from metrics import LoopLagMonitor
+
+COMPLETED_AT = datetime(2024, 1, 2, 3, 4, 5)
+
+
+async def result_rows(count: int, batch_size: int = 1000):
+    # Yields like a Motor cursor: rows are built as they are read, with a round trip per batch
+    for user_id in range(count):
+        if user_id % batch_size == 0:
+            await asyncio.sleep(0)
+        yield {"chat_id": -1001, "user_id": user_id, "first_name": f"user{user_id}", "correct": 7, "wrong": 3,
+               "total": 10, "accuracy": 70.0, "completed_at": COMPLETED_AT}
+
+
+def test_csv_export_has_a_header_and_one_line_per_row():
+    async def scenario():
+        out = io.StringIO()
+        
+        assert await write_results(result_rows(2), "csv", out) == 2
+        
+        lines = out.getvalue().splitlines()
+        assert lines[0] == ",".join(EXPORT_FIELDS)
+        assert lines[1] == "-1001,0,user0,7,3,10,70.0,2024-01-02T03:04:05"
+        assert len(lines) == 3
+    
+    asyncio.run(scenario())
+
+
+def test_ndjson_export_writes_one_object_per_line():
+    async def scenario():
+        out = io.StringIO()
+        
+        assert await write_results(result_rows(2), "ndjson", out) == 2
+        
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert rows[1]["user_id"] == 1
+        assert rows[1]["completed_at"] == "2024-01-02T03:04:05"
+    
+    asyncio.run(scenario())
+
+
+def test_unknown_formats_are_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(write_results(result_rows(1), "xml", io.StringIO()))
+
+
+async def export(rows: int, file_format: str, path, traced: bool = False) -> dict:
+    monitor = LoopLagMonitor(interval=0.01, warn_ms=float("inf"))
+    monitor.start()
+    await asyncio.sleep(0.02)
+    
+    with open(path, "w", encoding="utf-8", newline="") as out:
+        if traced:
+            tracemalloc.start()
+        try:
+            started = time.monotonic()
+            written = await write_results(result_rows(rows), file_format, out)
+            elapsed = time.monotonic() - started
+            peak = tracemalloc.get_traced_memory()[1] if traced else None
+        finally:
+            tracemalloc.stop()
+    
+    monitor._task.cancel()
+    return {"written": written, "elapsed": elapsed, "peak": peak, "lag": monitor.lag.summary()["max"]}
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("file_format", ["csv", "ndjson"])
+def test_export_of_1m_rows(tmp_path, report, file_format):
+    path = tmp_path / f"results.{file_format}"
+    
+    # Tracing allocations slows encoding several times over, so memory is measured on smaller
+    # exports: if rows are streamed, the peak does not grow with the row count
+    full = asyncio.run(export(1_000_000, file_format, path))
+    size = path.stat().st_size
+    small = asyncio.run(export(10_000, file_format, path, traced=True))
+    large = asyncio.run(export(100_000, file_format, path, traced=True))
+    
+    report(
+        f"{file_format}: {full['written']} rows, {size // (1024 * 1024)}MB in {full['elapsed']:.1f}s, "
+        f"loop lag max {full['lag']:.0f}ms; traced peak {small['peak'] // 1024}KB at 10k rows, "
+        f"{large['peak'] // 1024}KB at 100k rows"
+    )
+    
+    assert full["written"] == 1_000_000
+    assert large["peak"] < small["peak"] * 2
@@ -0,0 +1,71 @@
+import asyncio
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from database import Database
+from conftest import FakeCollection, make_fake_db, make_quiz
+
+
+class UniqueQuizzes(FakeCollection):
+    # Enforces the unique quiz_id and content_hash indexes
+    def _conflict(self, doc: dict):
+        for field in ("quiz_id", "content_hash"):
+            if doc.get(field) is not None and any(existing.get(field) == doc[field] for existing in self.docs):
+                return {"code": 11000, "keyPattern": {field: 1}, "errmsg": f"E11000 index: {field}_1 dup key"}
+        return None
+    
+    async def insert_one(self, doc: dict):
+        error = self._conflict(doc)
+        if error:
+            raise DuplicateKeyError(error["errmsg"], 11000, error)
+        return await super().insert_one(doc)
+    
+    async def insert_many(self, docs: list, ordered: bool = True):
+        errors = []
+        
+        for index, doc in enumerate(docs):
+            error = self._conflict(doc)
+            if error:
+                errors.append(dict(error, index=index))
+            else:
+                await super().insert_many([doc])
+        
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(docs) - len(errors)})
+
+
+def make_db(monkeypatch, quiz_ids: list) -> Database:
+    ids = iter(quiz_ids)
+    monkeypatch.setattr(Database, "_new_quiz_id", staticmethod(lambda: next(ids)))
+    db = make_fake_db(quizzes=[{"quiz_id": "taken"}])
+    db.quizzes = UniqueQuizzes(db.quizzes.docs, name="quizzes")
+    return db
+
+
+def entry(name: str) -> dict:
+    return {"name": name, "time_per_question": 30, "questions": make_quiz(2)["questions"], "errors": []}
+
+
+def test_create_quiz_draws_a_new_id_on_collision(monkeypatch):
+    async def scenario():
+        db = make_db(monkeypatch, ["taken", "taken", "fresh"])
+        
+        quiz_id = await db.create_quiz(1, "Capitals", make_quiz(2)["questions"], 30)
+        
+        assert quiz_id == "fresh"
+        assert [doc["quiz_id"] for doc in db.quizzes.docs] == ["taken", "fresh"]
+        assert db.quiz_cache.get("fresh") is not None
+    
+    asyncio.run(scenario())
+
+
+def test_bulk_import_retries_colliding_ids(monkeypatch):
+    async def scenario():
+        db = make_db(monkeypatch, ["first", "taken", "second"])
+        
+        report = await db.import_quizzes(1, [entry("One"), entry("Two"), entry("Two")])
+        
+        assert [(item["status"], item["quiz_id"]) for item in report] == [
+            ("created", "first"), ("created", "second"), ("duplicate", "second")
+        ]
+        assert sorted(doc["quiz_id"] for doc in db.quizzes.docs) == ["first", "second", "taken"]
+    
+    asyncio.run(scenario())
@@ -0,0 +1,42 @@
+import asyncio
+from datetime import datetime, timedelta
+from database import Database
+from conftest import make_fake_db
+
+
+def result(db: Database, quiz_id: str, completed_at: datetime) -> dict:
+    doc = db._result_doc(quiz_id, -1, 1, "Ada", 1, 0, 1, 100.0)
+    doc["completed_at"] = completed_at
+    return doc
+
+
+def test_results_held_back_past_a_refresh_still_refresh_their_quiz():
+    async def scenario():
+        db = make_fake_db()
+        await db.save_results([result(db, "played", datetime.utcnow())])
+        await db.refresh_leaderboards()
+        first_refresh = (await db.get_leaderboard_snapshot("global"))["generated_at"]
+        
+        # Completed before the refresh, but only stored after it (e.g. while MongoDB was degraded)
+        late = result(db, "late", datetime.utcnow() - timedelta(hours=1))
+        await db.save_results([late])
+        await db.refresh_leaderboards()
+        
+        assert late["completed_at"] < first_refresh
+        assert await db.get_leaderboard_snapshot("quiz:late") is not None
+    
+    asyncio.run(scenario())
+
+
+def test_refresh_looks_back_over_inserts_in_flight():
+    async def scenario():
+        db = make_fake_db()
+        await db.refresh_leaderboards()
+        generated_at = (await db.get_leaderboard_snapshot("global"))["generated_at"]
+        
+        await db.refresh_leaderboards()
+        
+        assert db.results.distinct_queries[0] is None
+        assert db.results.distinct_queries[1] == {"stored_at": {"$gte": generated_at - db._insert_window()}}
+    
+    asyncio.run(scenario())
@@ -0,0 +1,191 @@
+import io
+import time
+import tracemalloc
+import pytest
+from utils import parse_quiz_stream, parse_quiz_text, parse_quiz_path, parse_bulk_file, iter_quiz_rows, MAX_ROW_LENGTH
+
+
+def csv_row(idx: int, correct: int = 0, explanation: str = "") -> str:
+    return f"Question number {idx},A,B,C,D,{correct},{explanation}\n"
+
+
+class CountingLines:
+    def __init__(self, lines):
+        self.lines = iter(lines)
+        self.read = 0
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        line = next(self.lines)
+        self.read += 1
+        return line
+
+
+def test_valid_csv_rows_become_questions():
+    content = io.StringIO("".join(csv_row(idx, idx % 4, "because") for idx in range(3)))
+    
+    questions, errors, skipped = parse_quiz_stream(content, "csv")
+    
+    assert [q["correct_option"] for q in questions] == [0, 1, 2]
+    assert questions[0]["explanation"] == "because"
+    assert errors == [] and skipped == []
+
+
+def test_txt_rows_are_pipe_separated_and_blank_lines_ignored():
+    questions, errors, skipped = parse_quiz_text(
+        "Question number 1|A|B|C|D|1\n\nQuestion number 2|A|B|C|D|3|why\n"
+    )
+    
+    assert [q["correct_option"] for q in questions] == [1, 3]
+    assert questions[1]["explanation"] == "why"
+    assert errors == [] and skipped == []
+
+
+def test_rows_with_bad_structure_are_skipped():
+    content = io.StringIO(csv_row(1) + "too,few\n" + "Question number 3,A,B,C,D,x\n" + csv_row(4))
+    
+    questions, errors, skipped = parse_quiz_stream(content, "csv")
+    
+    assert len(questions) == 2
+    assert errors == []
+    assert skipped == ["Row 2: insufficient columns", "Row 3: invalid correct option"]
+
+
+def test_rows_failing_validation_are_errors():
+    content = io.StringIO(csv_row(1) + "Hi?,A,B,C,D,0\n" + csv_row(3))
+    
+    questions, errors, skipped = parse_quiz_stream(content, "csv")
+    
+    assert len(questions) == 2
+    assert errors == ["Row 2: Question text too short"]
+
+
+def test_every_row_error_is_reported_in_one_pass():
+    rows = [csv_row(1), "Hi?,A,B,C,D,0\n", csv_row(3), "Question number 4,A,B,C,D,9\n", "Hey,A,B,C,D,1\n"]
+    
+    questions, errors, skipped = parse_quiz_stream(io.StringIO("".join(rows)), "csv")
+    
+    assert len(questions) == 2
+    assert errors == ["Row 2: Question text too short", "Row 5: Question text too short"]
+    assert skipped == ["Row 4: correct option out of range"]
+
+
+def test_stops_reading_once_the_question_limit_is_hit():
+    lines = CountingLines(csv_row(idx) for idx in range(10_000))
+    
+    questions, errors, skipped = parse_quiz_stream(lines, "csv", max_questions=5)
+    
+    assert len(questions) == 5
+    assert errors == ["Maximum 5 questions allowed"]
+    assert lines.read == 6
+
+
+def test_stops_reading_once_the_error_limit_is_hit():
+    lines = CountingLines("bad,row\n" for _ in range(10_000))
+    
+    questions, errors, skipped = parse_quiz_stream(lines, "csv", max_errors=3)
+    
+    assert questions == []
+    assert len(skipped) == 3
+    assert errors == ["Stopped after 3 invalid rows"]
+    assert lines.read == 3
+
+
+def test_deadline_stops_parsing():
+    questions, errors, skipped = parse_quiz_stream(io.StringIO(csv_row(1)), "csv", deadline=0)
+    
+    assert questions == []
+    assert errors == ["Parsing timed out at row 1"]
+
+
+def test_rows_are_yielded_lazily():
+    rows = iter_quiz_rows(CountingLines(csv_row(idx) for idx in range(1000)), "csv")
+    
+    idx, question, error, fatal = next(rows)
+    
+    assert (idx, error, fatal) == (1, None, False)
+    assert question["question"] == "Question number 0"
+
+
+def test_malformed_csv_rejects_the_upload():
+    # An unclosed quote swallows the following lines until the reader's field size limit
+    unclosed = f'Question number 2,"{"A" * 100}\n' + "A" * 4000 + "\n"
+    rows = [csv_row(1), unclosed] + ["A" * 4000 + "\n"] * 40 + [csv_row(idx) for idx in range(3, 8)]
+    
+    questions, errors, skipped = parse_quiz_stream(io.StringIO("".join(rows)), "csv")
+    
+    assert len(errors) == 1
+    assert errors[0].startswith("Row 2: malformed CSV")
+    assert skipped == []
+
+
+def test_over_long_lines_reject_the_upload():
+    rows = [csv_row(1), f"Question number 2,{'A' * MAX_ROW_LENGTH},B,C,D,0\n", csv_row(3)]
+    
+    questions, errors, skipped = parse_quiz_stream(io.StringIO("".join(rows)), "csv")
+    
+    assert len(questions) == 1
+    assert errors == [f"Row 2: line longer than {MAX_ROW_LENGTH} characters, rows after it were not read"]
+
+
+def test_a_file_without_newlines_is_read_in_bounded_pieces(tmp_path):
+    path = tmp_path / "quiz.txt"
+    path.write_text("Question number 1|A|B|C|D|1\n" + "x" * 1_000_000)
+    
+    tracemalloc.start()
+    try:
+        questions, errors, skipped = parse_quiz_path(str(path), "txt")
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    
+    assert len(questions) == 1
+    assert errors[0].startswith("Row 2: line longer than")
+    assert peak < 100_000
+
+
+def test_bulk_txt_with_an_over_long_line_is_reported_invalid(tmp_path):
+    path = tmp_path / "bulk.txt"
+    path.write_text("### First quiz\nQuestion number 1|A|B|C|D|1\n### Second quiz\n" + "x" * 10_000)
+    
+    entries = parse_bulk_file(str(path), "txt", 30)
+    
+    assert [entry["name"] for entry in entries] == ["First quiz", "bulk"]
+    assert entries[0]["errors"] == []
+    assert entries[1]["errors"] == [f"line longer than {MAX_ROW_LENGTH} characters, rows after it were not read"]
+
+
+def malformed_inputs(size: int) -> dict:
+    row = "Question number 1|A|B|C|D|1\n"
+    return {
+        "txt without newlines": ("txt", "x" * size),
+        "csv without newlines": ("csv", "x," * (size // 2)),
+        "csv with an unclosed quote": ("csv", '"' + ("x" * 100 + "\n") * (size // 101)),
+        "txt with bad rows": ("txt", row.replace("|1", "|9") * (size // len(row)))
+    }
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("size", [10 * 1024 * 1024, 100 * 1024 * 1024])
+def test_malformed_uploads_use_bounded_memory(tmp_path, report, size):
+    for name, (file_type, content) in malformed_inputs(size).items():
+        path = tmp_path / f"upload.{file_type}"
+        path.write_text(content)
+        del content
+        
+        started = time.monotonic()
+        tracemalloc.start()
+        try:
+            questions, errors, skipped = parse_quiz_path(str(path), file_type)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        elapsed = time.monotonic() - started
+        
+        report(f"{size // (1024 * 1024)}MB {name}: peak {peak // 1024}KB in {elapsed * 1000:.0f}ms ({errors[-1]})")
+        
+        assert questions == []
+        assert errors
+        assert peak < 1024 * 1024
@@ -0,0 +1,41 @@
+import asyncio
+from pymongo import UpdateOne
+from database import Database
+from utils import question_doc, normalize_question, question_hash
+from conftest import FakeCollection
+
+
+def make_question(text: str, explanation: str = "") -> dict:
+    return {
+        "question": text,
+        "option_a": "A",
+        "option_b": "B",
+        "option_c": "C",
+        "option_d": "D",
+        "correct_option": 1,
+        "explanation": explanation
+    }
+
+
+def test_whitespace_differences_share_a_hash():
+    spaced = make_question("What  is\n2 + 2?", " Four ")
+    plain = make_question("What is 2 + 2?", "Four")
+    
+    assert question_hash(normalize_question(spaced)) == question_hash(normalize_question(plain))
+
+
+def test_stored_questions_keep_their_original_text():
+    async def scenario():
+        db = Database()
+        db.questions = FakeCollection()
+        question = make_question("Line one\n  Line two?", "Because\n\nreasons")
+        
+        question_ids = await db.store_questions([question, make_question("Line one Line two?", "Because reasons")])
+        
+        assert question_ids[0] == question_ids[1]
+        assert db.questions.requests == [
+            UpdateOne({"_id": question_ids[0]}, {"$setOnInsert": question_doc(question)}, upsert=True)
+        ]
+        assert db.question_cache.get(question_ids[0])["question"] == "Line one\n  Line two?"
+    
+    asyncio.run(scenario())
@@ -0,0 +1,318 @@
+import asyncio
+import gc
+import tracemalloc
+import pytest
+from config import Config
+from database import Database
+from quiz_manager import QuizManager, PollRecord, Participant
+from state import MemoryStateStore, RunCheckpointStore
+from conftest import LocalSharedStore, poll_answer, wait_for, make_quiz, stop_manager
+
+
+def test_runs_of_one_quiz_share_poll_payloads(fake_client):
+    async def scenario():
+        quiz_manager = QuizManager(fake_client, Database())
+        quiz_manager.start()
+        quiz = make_quiz()
+        
+        await quiz_manager.start_quiz(-1001, "quiz-1", quiz, delay=60)
+        await quiz_manager.start_quiz(-1002, "quiz-1", quiz, delay=60)
+        first = quiz_manager.active_quizzes[-1001]["payloads"]
+        second = quiz_manager.active_quizzes[-1002]["payloads"]
+        
+        # A reloaded quiz document gets its own payloads
+        await quiz_manager.start_quiz(-1003, "quiz-1", make_quiz(), delay=60)
+        reloaded = quiz_manager.active_quizzes[-1003]["payloads"]
+        await stop_manager(quiz_manager)
+        
+        assert first is second
+        assert reloaded is not first and reloaded == first
+        with pytest.raises(TypeError):
+            first[0]["question"] = "changed"
+    
+    asyncio.run(scenario())
+
+
+def test_invalid_questions_are_rejected_at_start(fake_client):
+    async def scenario():
+        quiz_manager = QuizManager(fake_client, Database())
+        quiz = make_quiz()
+        quiz["questions"][1]["option_c"] = ""
+        
+        with pytest.raises(ValueError, match="Question 2"):
+            await quiz_manager.start_quiz(-1001, "quiz-1", quiz)
+    
+    asyncio.run(scenario())
+
+
+def test_failed_send_cleans_up_even_when_the_notice_fails(fake_client):
+    async def scenario():
+        fake_client.failures["send_poll"] = [RuntimeError("chat not found")]
+        fake_client.failures["send_message"] = [RuntimeError("chat not found")]
+        state = LocalSharedStore()
+        quiz_manager = QuizManager(fake_client, Database(), state)
+        quiz_manager.start()
+        
+        await quiz_manager.start_quiz(-1001, "quiz-1", make_quiz())
+        await quiz_manager.checkpoint()
+        await wait_for(lambda: -1001 not in quiz_manager.active_quizzes)
+        scheduled = quiz_manager.scheduler.is_scheduled(("quiz", -1001))
+        await stop_manager(quiz_manager)
+        
+        assert fake_client.methods() == ["send_poll", "send_message"]
+        assert not scheduled
+        # Nothing is left behind to resume after a restart
+        assert await quiz_manager.runs.get_runs() == []
+    
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("live_scoreboard", [False, True])
+def test_leaderboard_order_with_and_without_live_ranking(fake_client, monkeypatch, live_scoreboard):
+    monkeypatch.setattr(Config, "LIVE_SCOREBOARD", live_scoreboard)
+    
+    async def scenario():
+        quiz_manager = QuizManager(fake_client, Database())
+        quiz_manager.start()
+        await quiz_manager.start_quiz(-1001, "quiz-1", make_quiz(), delay=60)
+        quiz_data = quiz_manager.active_quizzes[-1001]
+        
+        scores = {1: (1, 2), 2: (3, 0), 3: (2, 1), 4: (0, 3)}
+        for user_id, (correct, wrong) in scores.items():
+            participant = quiz_data["participants"][user_id] = Participant(f"user{user_id}")
+            participant.correct, participant.wrong = correct, wrong
+            if quiz_data["ranking"] is not None:
+                quiz_data["ranking"].update(user_id, correct)
+        
+        leaderboard = quiz_manager.get_leaderboard(-1001, 3)
+        await stop_manager(quiz_manager)
+        
+        assert (quiz_data["ranking"] is not None) == live_scoreboard
+        assert [(entry["user_id"], entry["correct"]) for entry in leaderboard] == [(2, 3), (3, 2), (1, 1)]
+    
+    asyncio.run(scenario())
+
+
+async def open_first_poll(quiz_manager: QuizManager, chat_id: int) -> str:
+    await wait_for(lambda: quiz_manager.chat_polls.get(chat_id))
+    return next(iter(quiz_manager.chat_polls[chat_id]))
+
+
+def test_answers_never_wait_on_the_state_store(fake_client):
+    async def scenario():
+        state = LocalSharedStore(blocked=True)
+        quiz_manager = QuizManager(fake_client, Database(), state)
+        quiz_manager.start()
+        
+        await quiz_manager.start_quiz(-1001, "quiz-1", make_quiz())
+        poll_id = await open_first_poll(quiz_manager, -1001)
+        
+        for user_id in range(100):
+            quiz_manager.handle_answer(poll_answer(poll_id, user_id, 0))
+        
+        await wait_for(lambda: quiz_manager.answer_queue.processed == 100)
+        participants = quiz_manager.active_quizzes[-1001]["participants"]
+        await stop_manager(quiz_manager)
+        
+        assert len(participants) == 100
+        assert state.executed == 0
+    
+    asyncio.run(scenario())
+
+
+def test_memory_backend_keeps_no_second_copy_of_runs(fake_client):
+    async def scenario():
+        state = MemoryStateStore()
+        quiz_manager = QuizManager(fake_client, Database(), state)
+        quiz_manager.start()
+        
+        await quiz_manager.start_quiz(-1001, "quiz-1", make_quiz())
+        poll_id = await open_first_poll(quiz_manager, -1001)
+        quiz_manager.handle_answer(poll_answer(poll_id, 1, 0))
+        await wait_for(lambda: quiz_manager.answer_queue.processed == 1)
+        await stop_manager(quiz_manager)
+        
+        assert quiz_manager.runs is quiz_manager.db
+        assert state._hashes == {} and state._values == {}
+    
+    asyncio.run(scenario())
+
+
+def test_shared_backend_checkpoints_resume_in_another_process(fake_client):
+    async def scenario():
+        state = LocalSharedStore()
+        quiz = make_quiz()
+        db = Database()
+        db.quiz_cache.put("quiz-1", quiz)
+        
+        quiz_manager = QuizManager(fake_client, db, state)
+        quiz_manager.start()
+        await quiz_manager.start_quiz(-1001, "quiz-1", quiz)
+        poll_id = await open_first_poll(quiz_manager, -1001)
+        
+        quiz_manager.handle_answer(poll_answer(poll_id, 1, 0, "Ada"))
+        quiz_manager.handle_answer(poll_answer(poll_id, 2, 3, "Bob"))
+        await wait_for(lambda: quiz_manager.answer_queue.processed == 2)
+        await quiz_manager.checkpoint()
+        await stop_manager(quiz_manager)
+        
+        assert state.executed == 1
+        
+        replica = QuizManager(fake_client, db, state)
+        replica.start()
+        await replica.resume_runs()
+        quiz_data = replica.active_quizzes[-1001]
+        participants = quiz_data["participants"]
+        polls = dict(replica.poll_mapping)
+        await stop_manager(replica)
+        
+        assert (participants[1].first_name, participants[1].correct, participants[1].wrong) == ("Ada", 1, 0)
+        assert (participants[2].first_name, participants[2].correct, participants[2].wrong) == ("Bob", 0, 1)
+        assert participants[1].answered == 1
+        assert polls[poll_id].chat_id == -1001
+        assert quiz_data["next_question"] == 1
+    
+    asyncio.run(scenario())
+
+
+def test_run_checkpoint_store_round_trip():
+    async def scenario():
+        runs = RunCheckpointStore(MemoryStateStore())
+        
+        await runs.save_run_checkpoints([(-5, {
+            "quiz_id": "quiz-1",
+            "current_question": 2,
+            "question_sent_at": 12.5,
+            "paused": True,
+            "participants.7": {"first_name": "Ada", "correct": 2, "wrong": 0, "answered": "3"},
+            "polls.99": [2, 1]
+        })])
+        
+        assert await runs.get_runs() == [{
+            "_id": -5,
+            "quiz_id": "quiz-1",
+            "current_question": 2,
+            "question_sent_at": 12.5,
+            "paused": True,
+            "participants": {"7": {"first_name": "Ada", "correct": 2, "wrong": 0, "answered": "3"}},
+            "polls": {"99": [2, 1]}
+        }]
+        
+        await runs.delete_run(-5)
+        assert await runs.get_runs() == []
+    
+    asyncio.run(scenario())
+
+
+@pytest.mark.slow
+def test_poll_index_memory_at_10k_concurrent_chats(fake_client, report, monkeypatch):
+    monkeypatch.setattr(Config, "POLL_RETIRE_GRACE", 0)
+    chats = 10_000
+    rounds = 10
+    
+    async def scenario():
+        quiz_manager = QuizManager(fake_client, Database())
+        quiz_manager.scheduler.start()
+        live = []
+        
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            
+            # Every chat has one open poll at a time; each round is the next question
+            for question_index in range(rounds):
+                for chat_id in range(chats):
+                    record = PollRecord(chat_id, "quiz-1", question_index, 0)
+                    quiz_manager._register_poll(f"poll-{question_index}-{chat_id}", record, 0.05)
+                
+                gc.collect()
+                live.append(tracemalloc.get_traced_memory()[0] - baseline)
+                await wait_for(lambda: not quiz_manager.poll_mapping)
+            
+            gc.collect()
+            retired = tracemalloc.get_traced_memory()[0] - baseline
+        finally:
+            tracemalloc.stop()
+            await quiz_manager.scheduler.stop()
+        
+        report(
+            f"{chats} open polls: {live[0] // 1024}KB ({live[0] // chats} bytes per poll incl. retire timer), "
+            f"after {rounds} questions {live[-1] // 1024}KB, all retired {retired // 1024}KB"
+        )
+        
+        assert quiz_manager.chat_polls == {}
+        # Retired polls give their memory back, so the index doesn't grow question after question
+        assert live[-1] < live[0] * 1.2
+        assert retired < live[0] * 0.2
+    
+    asyncio.run(scenario())
+
+
+def traced(build):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+@pytest.mark.slow
+def test_bytes_per_participant_under_an_answer_flood(fake_client, report):
+    answers = 100_000
+    
+    async def scenario():
+        quiz_manager = QuizManager(fake_client, Database())
+        quiz_manager.start()
+        await quiz_manager.start_quiz(-1001, "quiz-1", make_quiz())
+        poll_id = await open_first_poll(quiz_manager, -1001)
+        flood_answers = [poll_answer(poll_id, user_id, user_id % 4) for user_id in range(answers)]
+        
+        gc.collect()
+        tracemalloc.start()
+        try:
+            for user_id, answer in enumerate(flood_answers):
+                quiz_manager.handle_answer(answer)
+                if user_id % 1000 == 999:
+                    await asyncio.sleep(0)
+            
+            await wait_for(lambda: quiz_manager.answer_queue.processed == answers, timeout=60)
+            gc.collect()
+            flood = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        
+        await stop_manager(quiz_manager)
+        return flood
+    
+    flood = asyncio.run(scenario())
+    names = [f"user{user_id}" for user_id in range(answers)]
+    
+    def records():
+        participants = {}
+        for user_id, name in enumerate(names):
+            participant = participants[user_id] = Participant(name)
+            participant.record_answer(0, user_id % 4 == 0)
+        return participants
+    
+    def dicts():
+        # The per-participant dict and answered set these records replaced
+        return {
+            user_id: {"first_name": name, "correct": int(user_id % 4 == 0), "wrong": int(user_id % 4 != 0),
+                      "answered": {0}}
+            for user_id, name in enumerate(names)
+        }
+    
+    record_size = traced(records)
+    dict_size = traced(dicts)
+    
+    report(
+        f"{answers} answers from distinct users: {flood // answers} bytes per participant for the whole run state, "
+        f"{record_size // answers} bytes per Participant record vs {dict_size // answers} as a dict with a set"
+    )
+    
+    assert record_size < dict_size / 2
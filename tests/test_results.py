@@ -0,0 +1,70 @@
+import asyncio
+import time
+import pytest
+from config import Config
+from database import Database
+from conftest import make_fake_db, wait_for
+
+
+def queue(db: Database, quiz_id: str, count: int):
+    for user_id in range(count):
+        db.queue_result(quiz_id, -1, user_id, f"user{user_id}", 1, 0, 1, 100.0)
+
+
+def test_cancelled_flush_keeps_the_buffer():
+    async def scenario():
+        db = make_fake_db(quizzes=[{"quiz_id": "quiz-1"}])
+        db.results.latency = 60
+        queue(db, "quiz-1", 10)
+        
+        flush = asyncio.create_task(db.flush_results())
+        await wait_for(lambda: db.results.calls["insert_many"])
+        flush.cancel()
+        
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+        
+        assert len(db._pending_results) == 10
+        
+        db.results.latency = 0
+        assert await db.flush_results() == 10
+        assert db._pending_results == []
+    
+    asyncio.run(scenario())
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("participants", [10, 1_000, 10_000])
+def test_bulk_write_benchmark(report, participants):
+    # Every round trip to the fake collection costs 1ms, standing in for the network
+    async def scenario():
+        db = make_fake_db(quizzes=[{"quiz_id": "quiz-1"}])
+        db.results.latency = 0.001
+        
+        started = time.monotonic()
+        for user_id in range(participants):
+            await db.results.insert_one(db._result_doc("quiz-1", -1, user_id, "Ada", 1, 0, 1, 100.0))
+        per_row = time.monotonic() - started
+        per_row_trips = db.results.calls["insert_one"]
+        
+        collections = (db.quizzes, db.results, db.user_stats, db.quiz_stats)
+        for collection in collections:
+            collection.calls.clear()
+        
+        queue(db, "quiz-1", participants)
+        started = time.monotonic()
+        await db.flush_results()
+        batched = time.monotonic() - started
+        batched_trips = sum(collection.calls.total() for collection in collections)
+        
+        report(
+            f"{participants} participants: one insert per row {per_row * 1000:.0f}ms / {per_row_trips} round trips, "
+            f"batched flush {batched * 1000:.0f}ms / {batched_trips} round trips"
+        )
+        
+        assert len(db.results.docs) == 2 * participants
+        # One liveness check, then an insert and a user stats write per RESULT_BATCH_SIZE rows, and one quiz stats write
+        batches = -(-participants // Config.RESULT_BATCH_SIZE)
+        assert batched_trips == 2 + 2 * batches
+    
+    asyncio.run(scenario())
@@ -0,0 +1,156 @@
+import asyncio
+from scheduler import Scheduler
+
+
+def test_jobs_fire_in_deadline_order():
+    async def scenario():
+        scheduler = Scheduler()
+        scheduler.start()
+        fired = []
+        
+        scheduler.schedule("late", 0.06, fired.append, "late")
+        scheduler.schedule("early", 0.02, fired.append, "early")
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+        
+        assert fired == ["early", "late"]
+        assert len(scheduler) == 0
+    
+    asyncio.run(scenario())
+
+
+def test_rescheduling_replaces_the_pending_job():
+    async def scenario():
+        scheduler = Scheduler()
+        scheduler.start()
+        fired = []
+        
+        scheduler.schedule("quiz", 0.02, fired.append, "first")
+        scheduler.schedule("quiz", 0.04, fired.append, "second")
+        await asyncio.sleep(0.08)
+        await scheduler.stop()
+        
+        assert fired == ["second"]
+    
+    asyncio.run(scenario())
+
+
+def test_cancel_drops_a_pending_job():
+    async def scenario():
+        scheduler = Scheduler()
+        scheduler.start()
+        fired = []
+        
+        scheduler.schedule("quiz", 0.02, fired.append, "quiz")
+        assert scheduler.cancel("quiz") is True
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        
+        assert fired == []
+        assert scheduler.cancel("quiz") is False
+    
+    asyncio.run(scenario())
+
+
+def test_cancel_stops_a_running_job():
+    async def scenario():
+        scheduler = Scheduler()
+        scheduler.start()
+        state = {"started": False, "cancelled": False}
+        
+        async def send_question():
+            state["started"] = True
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+        
+        scheduler.schedule("quiz", 0, send_question)
+        await asyncio.sleep(0.02)
+        assert state["started"]
+        
+        assert scheduler.cancel("quiz") is True
+        await asyncio.sleep(0.01)
+        await scheduler.stop()
+        
+        assert state["cancelled"]
+        assert scheduler.stats()["running"] == 0
+    
+    asyncio.run(scenario())
+
+
+def test_cancel_can_leave_the_running_job_alone():
+    async def scenario():
+        scheduler = Scheduler()
+        scheduler.start()
+        finished = []
+        
+        async def send_question():
+            await asyncio.sleep(0.03)
+            finished.append(True)
+        
+        scheduler.schedule("quiz", 0, send_question)
+        await asyncio.sleep(0.01)
+        scheduler.cancel("quiz", running=False)
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        
+        assert finished == [True]
+    
+    asyncio.run(scenario())
+
+
+def test_pause_keeps_the_remaining_delay():
+    async def scenario():
+        scheduler = Scheduler()
+        scheduler.start()
+        loop = asyncio.get_running_loop()
+        fired = []
+        
+        scheduler.schedule("quiz", 0.1, lambda: fired.append(loop.time()))
+        await asyncio.sleep(0.04)
+        
+        assert scheduler.pause("quiz") is True
+        assert scheduler.is_paused("quiz") and not scheduler.is_scheduled("quiz")
+        await asyncio.sleep(0.15)
+        assert fired == []
+        
+        resumed_at = loop.time()
+        assert scheduler.resume("quiz") is True
+        await asyncio.sleep(0.15)
+        await scheduler.stop()
+        
+        assert len(fired) == 1
+        # About 0.06s were left when the job was paused
+        assert 0.03 <= fired[0] - resumed_at < 0.1
+    
+    asyncio.run(scenario())
+
+
+def test_pause_and_resume_of_unknown_keys():
+    async def scenario():
+        scheduler = Scheduler()
+        
+        assert scheduler.pause("missing") is False
+        assert scheduler.resume("missing") is False
+    
+    asyncio.run(scenario())
+
+
+def test_cancel_drops_a_paused_job():
+    async def scenario():
+        scheduler = Scheduler()
+        scheduler.start()
+        fired = []
+        
+        scheduler.schedule("quiz", 0.02, fired.append, "quiz")
+        scheduler.pause("quiz")
+        assert scheduler.cancel("quiz") is True
+        assert scheduler.resume("quiz") is False
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        
+        assert fired == []
+    
+    asyncio.run(scenario())
@@ -0,0 +1,60 @@
+import asyncio
+from quiz_manager import QuizManager
+from sharding import ShardRouter, serve_shard, shard_for
+from conftest import FakeClient, make_fake_db, make_quiz, poll_answer, stop_manager, wait_for
+
+SHARDS = 2
+
+
+def chats_per_shard() -> dict:
+    chats = {}
+    chat_id = -1001
+    
+    while len(chats) < SHARDS:
+        chats.setdefault(shard_for(chat_id, SHARDS), chat_id)
+        chat_id -= 1
+    
+    return chats
+
+
+def test_answers_are_routed_to_the_owning_shard(tmp_path):
+    async def scenario():
+        # One client for all shards, so poll ids stay unique the way Telegram's are
+        client = FakeClient()
+        managers = {}
+        
+        async def factory(shard_id: int, shard_count: int) -> QuizManager:
+            db = make_fake_db()
+            db.quiz_cache.put("quiz-1", make_quiz())
+            managers[shard_id] = QuizManager(client, db)
+            return managers[shard_id]
+        
+        socket_path = str(tmp_path / "router.sock")
+        router = ShardRouter(SHARDS, socket_path, factory)
+        await router.listen()
+        shards = [asyncio.create_task(serve_shard(shard_id, SHARDS, socket_path, factory)) for shard_id in range(SHARDS)]
+        
+        chats = chats_per_shard()
+        for chat_id in chats.values():
+            await router.start_quiz(chat_id, "quiz-1", None)
+        await wait_for(lambda: len(router.poll_shards) == SHARDS)
+        
+        for poll_id in router.poll_shards:
+            for user_id in range(3):
+                assert router.handle_answer(poll_answer(poll_id, user_id, 0))
+        
+        await wait_for(lambda: all(manager.answer_queue.processed == 3 for manager in managers.values()))
+        summaries = await router.get_quiz_summaries()
+        
+        for task in shards:
+            task.cancel()
+        for manager in managers.values():
+            await stop_manager(manager)
+        router._server.close()
+        
+        assert sorted(summaries) == sorted(chats.values())
+        assert all(summary["participants"] == 3 for summary in summaries.values())
+        for shard_id, chat_id in chats.items():
+            assert list(managers[shard_id].active_quizzes) == [chat_id]
+    
+    asyncio.run(scenario())
@@ -0,0 +1,95 @@
+import asyncio
+import time
+import pytest
+from quiz_manager import QuizManager
+from startquiz import start_quiz_request
+from conftest import make_fake_db, make_quiz, stop_manager
+
+QUIZ = dict(make_quiz(), quiz_id="quiz-1", creator_id=1)
+
+
+def make_manager(fake_client, results=()):
+    db = make_fake_db(quizzes=[QUIZ], results=results)
+    return QuizManager(fake_client, db)
+
+
+def test_start_quiz_request_starts_the_run(fake_client):
+    async def scenario():
+        quiz_manager = make_manager(fake_client)
+        
+        quiz, error = await start_quiz_request(quiz_manager.db, quiz_manager, "quiz-1", -1001, 7, False, 60)
+        
+        assert error is None and quiz["name"] == QUIZ["name"]
+        assert -1001 in quiz_manager.active_quizzes
+        
+        quiz, error = await start_quiz_request(quiz_manager.db, quiz_manager, "quiz-1", -1001, 7, False, 60)
+        assert error == "❌ A quiz is already running in this chat!"
+    
+    asyncio.run(scenario())
+
+
+def test_start_quiz_request_reports_why_it_cannot_start(fake_client):
+    async def scenario():
+        quiz_manager = make_manager(fake_client, results=[{"quiz_id": "quiz-1", "user_id": 7}])
+        db = quiz_manager.db
+        
+        assert await start_quiz_request(db, quiz_manager, "missing", 7, 7, True, 60) == (None, "❌ Quiz not found!")
+        assert await start_quiz_request(db, quiz_manager, "quiz-1", 7, 7, True, 60) == (
+            None, "❌ You have already attempted this quiz!"
+        )
+        # Groups don't enforce the single attempt
+        quiz, error = await start_quiz_request(db, quiz_manager, "quiz-1", -1001, 7, False, 60)
+        assert error is None
+    
+    asyncio.run(scenario())
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+@pytest.mark.slow
+def test_start_quiz_latency(fake_client, report):
+    # Every MongoDB round trip costs 5ms; the lookups run concurrently, so a cold start costs one
+    latency_ms = 5
+    starts = 500
+    
+    async def scenario():
+        quiz_manager = make_manager(fake_client)
+        db = quiz_manager.db
+        db.quizzes.latency = db.results.latency = latency_ms / 1000
+        quiz_manager.start()
+        timings = {}
+        
+        cases = {
+            "group, cached quiz": (False, False),
+            "group, quiz not cached": (False, True),
+            "private, quiz not cached, attempt lookup": (True, True)
+        }
+        
+        for name, (private, cold) in cases.items():
+            samples = timings[name] = []
+            
+            for idx in range(starts):
+                chat_id = idx + 1 if private else -(idx + 1)
+                if cold:
+                    db.quiz_cache.invalidate("quiz-1")
+                
+                started = time.monotonic()
+                quiz, error = await start_quiz_request(db, quiz_manager, "quiz-1", chat_id, idx, private, 60)
+                samples.append((time.monotonic() - started) * 1000)
+                
+                assert error is None
+                await quiz_manager._cleanup_quiz(chat_id)
+        
+        await stop_manager(quiz_manager)
+        return timings
+    
+    timings = asyncio.run(scenario())
+    
+    for name, samples in timings.items():
+        report(f"{name}: p50 {percentile(samples, 50):.2f}ms p99 {percentile(samples, 99):.2f}ms over {len(samples)} starts")
+    
+    assert percentile(timings["group, cached quiz"], 50) < latency_ms / 2
+    assert percentile(timings["private, quiz not cached, attempt lookup"], 50) < latency_ms * 1.5
@@ -0,0 +1,38 @@
+import asyncio
+from datetime import datetime
+from pymongo import DESCENDING
+from conftest import make_fake_db
+
+
+def result(user_id: int) -> dict:
+    return {"quiz_id": "quiz-1", "user_id": user_id, "first_name": "Ada", "correct": 1, "wrong": 0, "total": 1,
+            "completed_at": datetime.utcnow()}
+
+
+def test_rebuilt_stats_keep_their_indexes():
+    async def scenario():
+        db = make_fake_db(results=[result(1), result(2)])
+        await db.ensure_indexes()
+        
+        assert await db.rebuild_stats(batch_size=1) == 2
+        
+        user_stats = db.db["user_stats"]
+        assert user_stats is not db.user_stats
+        assert user_stats.indexes == [[("correct", DESCENDING)]]
+        assert len(user_stats.requests) == 2
+        assert "user_stats_rebuild" not in db.db.collections
+    
+    asyncio.run(scenario())
+
+
+def test_rebuild_without_results_empties_stats_in_place():
+    async def scenario():
+        db = make_fake_db(user_stats=[{"_id": 1, "correct": 3}])
+        await db.ensure_indexes()
+        
+        assert await db.rebuild_stats() == 0
+        
+        assert db.db["user_stats"].docs == []
+        assert db.db["user_stats"].indexes == [[("correct", DESCENDING)]]
+    
+    asyncio.run(scenario())
@@ -1,81 +1,373 @@
 import csv
+import io
+import os
+import json
+import time
+import hashlib
+import zipfile
 from io import StringIO
 import logging
 
 logger = logging.getLogger(__name__)
 
+MAX_QUESTIONS = 100
+MAX_ROW_ERRORS = 20
+QUIZ_HEADER = "###"
+MIN_QUESTION_TIME = 5
+QUESTION_TEXT_FIELDS = ("question", "option_a", "option_b", "option_c", "option_d", "explanation")
+MAX_QUESTION_TIME = 300
+MAX_MESSAGE_LENGTH = 4096
+MAX_ROW_LENGTH = 4096
 
-def parse_quiz_file(content: str, file_type: str) -> list:
-    questions = []
+
+class RowTooLong(ValueError):
+    pass
+
+
+def _bounded_lines(lines, limit: int = MAX_ROW_LENGTH):
+    readline = getattr(lines, "readline", None)
+    lines = iter(lines)
+    
+    # Files are read with a size cap, so a huge file without newlines is never loaded as one line
+    while True:
+        line = readline(limit + 2) or None if readline else next(lines, None)
+        if line is None:
+            return
+        
+        if len(line.rstrip("\r\n")) > limit:
+            raise RowTooLong(f"line longer than {limit} characters")
+        
+        yield line
+
+
+def _split_rows(lines, file_type: str):
+    if file_type == "csv":
+        return csv.reader(lines)
+    
+    return (line.rstrip("\r\n").split("|") for line in lines if line.strip())
+
+
+def _row_to_question(row: list) -> tuple:
+    if len(row) < 6:
+        return None, "insufficient columns"
+    
+    row = [cell.strip() for cell in row]
     
     try:
-        if file_type == "csv":
-            reader = csv.reader(StringIO(content))
-            rows = list(reader)
-        else:
-            rows = [line.split("|") for line in content.strip().split("\n") if line.strip()]
+        correct_option = int(row[5])
+    except ValueError:
+        return None, "invalid correct option"
+    
+    if correct_option < 0 or correct_option > 3:
+        return None, "correct option out of range"
+    
+    question_data = {
+        "question": row[0],
+        "option_a": row[1],
+        "option_b": row[2],
+        "option_c": row[3],
+        "option_d": row[4],
+        "correct_option": correct_option,
+        "explanation": row[6] if len(row) > 6 else ""
+    }
+    
+    return question_data, None
+
+
+def iter_quiz_rows(lines, file_type: str):
+    rows = _split_rows(_bounded_lines(lines), file_type)
+    idx = 0
+    
+    while True:
+        idx += 1
         
-        for idx, row in enumerate(rows, 1):
-            if len(row) < 6:
-                logger.warning(f"Skipping row {idx}: insufficient columns")
-                continue
+        try:
+            row = next(rows)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # The reader can't resume after this, so the rest of the file is unread
+            yield idx, None, f"malformed CSV ({e}), rows after it were not read", True
+            return
+        except RowTooLong as e:
+            yield idx, None, f"{e}, rows after it were not read", True
+            return
+        
+        question, error = _row_to_question(row)
+        if error:
+            yield idx, None, error, False
+            continue
+        
+        error = validate_question(question)
+        if error:
+            yield idx, None, error, True
+            continue
+        
+        yield idx, question, None, False
+
+
+def parse_quiz_stream(lines, file_type: str, max_questions: int = MAX_QUESTIONS,
+                      max_errors: int = MAX_ROW_ERRORS, deadline: float = None) -> tuple:
+    questions = []
+    errors = []
+    skipped = []
+    
+    for idx, question, error, fatal in iter_quiz_rows(lines, file_type):
+        if deadline is not None and time.monotonic() > deadline:
+            errors.append(f"Parsing timed out at row {idx}")
+            break
+        
+        if error:
+            if fatal:
+                errors.append(f"Row {idx}: {error}")
+            else:
+                logger.warning(f"Skipping row {idx}: {error}")
+                skipped.append(f"Row {idx}: {error}")
             
-            row = [cell.strip() for cell in row]
+            if len(errors) + len(skipped) >= max_errors:
+                errors.append(f"Stopped after {max_errors} invalid rows")
+                break
+            continue
+        
+        if len(questions) >= max_questions:
+            errors.append(f"Maximum {max_questions} questions allowed")
+            break
+        
+        questions.append(question)
+    
+    return questions, errors, skipped
+
+
+def parse_quiz_path(file_path: str, file_type: str, deadline: float = None) -> tuple:
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        return parse_quiz_stream(f, file_type, deadline=deadline)
+
+
+def parse_quiz_text(content: str, deadline: float = None) -> tuple:
+    return parse_quiz_stream(StringIO(content.strip()), "txt", deadline=deadline)
+
+
+def validate_question(q: dict) -> str:
+    if not q.get("question") or len(q["question"]) < 5:
+        return "Question text too short"
+    
+    if len(q["question"]) > 300:
+        return "Question text too long (max 300 chars)"
+    
+    for opt in ["option_a", "option_b", "option_c", "option_d"]:
+        if not q.get(opt) or len(q[opt]) < 1:
+            return f"Invalid option {opt}"
+        
+        if len(q[opt]) > 100:
+            return f"Option {opt} too long (max 100 chars)"
+    
+    if q.get("correct_option") not in [0, 1, 2, 3]:
+        return "Invalid correct option"
+    
+    if q.get("explanation") and len(q["explanation"]) > 200:
+        return "Explanation too long (max 200 chars)"
+    
+    return ""
+
+
+def question_doc(q) -> dict:
+    doc = {field: str(q.get(field) or "") for field in QUESTION_TEXT_FIELDS}
+    doc["correct_option"] = int(q["correct_option"])
+    return doc
+
+
+def normalize_question(q) -> dict:
+    normalized = {field: " ".join(str(q.get(field) or "").split()) for field in QUESTION_TEXT_FIELDS}
+    normalized["correct_option"] = int(q["correct_option"])
+    return normalized
+
+
+def question_hash(normalized: dict) -> str:
+    payload = json.dumps([normalized[field] for field in QUESTION_TEXT_FIELDS] + [normalized["correct_option"]],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def quiz_content_hash(creator_id: int, name: str, questions: list, time_per_question: int) -> str:
+    payload = json.dumps(
+        [creator_id, name.strip(), time_per_question, [dict(q) for q in questions]],
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _parse_header(line: str, default_time: int) -> tuple:
+    parts = [part.strip() for part in line[len(QUIZ_HEADER):].split("|")]
+    name = parts[0]
+    time_per_question = default_time
+    
+    if len(parts) > 1 and parts[1]:
+        try:
+            time_per_question = int(parts[1])
+        except ValueError:
+            time_per_question = None
+    
+    return name, time_per_question
+
+
+def iter_quiz_sections(lines, default_name: str, default_time: int):
+    name, time_per_question = default_name, default_time
+    section = []
+    
+    for line in lines:
+        if line.startswith(QUIZ_HEADER):
+            if section:
+                yield name, time_per_question, section
             
-            try:
-                correct_option = int(row[5])
-            except ValueError:
-                logger.warning(f"Skipping row {idx}: invalid correct option")
-                continue
+            name, time_per_question = _parse_header(line.strip(), default_time)
+            section = []
+        elif line.strip():
+            section.append(line)
+    
+    if section:
+        yield name, time_per_question, section
+
+
+def _bulk_entry(name: str, time_per_question, rows, file_type: str, deadline: float) -> dict:
+    questions, errors, skipped = parse_quiz_stream(rows, file_type, deadline=deadline)
+    
+    if len(name) < 3:
+        errors.insert(0, "Quiz name must be at least 3 characters")
+    
+    if time_per_question is None or not MIN_QUESTION_TIME <= time_per_question <= MAX_QUESTION_TIME:
+        errors.insert(0, f"Time per question must be between {MIN_QUESTION_TIME} and {MAX_QUESTION_TIME} seconds")
+    
+    if not questions and not errors:
+        errors.append("No valid questions found")
+    
+    return {
+        "name": name,
+        "time_per_question": time_per_question,
+        "questions": questions,
+        "errors": errors,
+        "skipped": len(skipped)
+    }
+
+
+def _parse_bulk_stream(lines, file_type: str, default_name: str, default_time: int, deadline: float) -> list:
+    if file_type == "csv":
+        return [_bulk_entry(default_name, default_time, lines, "csv", deadline)]
+    
+    entries = []
+    
+    try:
+        for name, time_per_question, section in iter_quiz_sections(_bounded_lines(lines), default_name, default_time):
+            entries.append(_bulk_entry(name, time_per_question, section, "txt", deadline))
+    except RowTooLong as e:
+        entries.append({
+            "name": default_name,
+            "time_per_question": default_time,
+            "questions": [],
+            "errors": [f"{e}, rows after it were not read"],
+            "skipped": 0
+        })
+    
+    return entries
+
+
+def parse_bulk_file(file_path: str, file_type: str, default_time: int, deadline: float = None) -> list:
+    default_name = os.path.splitext(os.path.basename(file_path))[0]
+    
+    if file_type != "zip":
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            return _parse_bulk_stream(f, file_type, default_name, default_time, deadline)
+    
+    entries = []
+    
+    with zipfile.ZipFile(file_path) as archive:
+        for member in archive.infolist():
+            member_name, member_ext = os.path.splitext(os.path.basename(member.filename))
+            member_ext = member_ext.lstrip(".").lower()
             
-            if correct_option < 0 or correct_option > 3:
-                logger.warning(f"Skipping row {idx}: correct option out of range")
+            if member.is_dir() or member_ext not in ("csv", "txt"):
                 continue
             
-            question_data = {
-                "question": row[0],
-                "option_a": row[1],
-                "option_b": row[2],
-                "option_c": row[3],
-                "option_d": row[4],
-                "correct_option": correct_option,
-                "explanation": row[6] if len(row) > 6 else ""
-            }
-            
-            questions.append(question_data)
-        
-    except Exception as e:
-        logger.error(f"Error parsing file: {e}")
-        raise
+            with archive.open(member) as raw:
+                lines = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+                entries.extend(_parse_bulk_stream(lines, member_ext, member_name, default_time, deadline))
     
-    return questions
+    return entries
 
 
-def validate_quiz_data(questions: list) -> tuple:
-    if not questions:
-        return False, "No questions provided"
-    
-    if len(questions) > 100:
-        return False, "Maximum 100 questions allowed"
+def format_import_report(report: list, limit: int = 30) -> str:
+    icons = {"created": "✅", "duplicate": "♻️", "invalid": "❌", "failed": "⚠️"}
+    counts = {}
+    lines = []
     
-    for idx, q in enumerate(questions, 1):
-        if not q.get("question") or len(q["question"]) < 5:
-            return False, f"Question {idx}: Question text too short"
+    for item in report:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
         
-        if len(q["question"]) > 300:
-            return False, f"Question {idx}: Question text too long (max 300 chars)"
+        if len(lines) < limit:
+            line = f"{icons.get(item['status'], '•')} {item['name']} — {item['status']}"
+            if item.get("quiz_id"):
+                line += f" `{item['quiz_id']}`"
+            if item.get("error"):
+                line += f" ({item['error']})"
+            lines.append(line)
+    
+    if len(report) > limit:
+        lines.append(f"...and {len(report) - limit} more")
+    
+    summary = ", ".join(f"{status}: {count}" for status, count in counts.items())
+    return f"{summary}\n\n" + "\n".join(lines)
+
+
+def _message_length(text: str) -> int:
+    # Telegram counts message length in UTF-16 code units
+    return len(text.encode("utf-16-le")) // 2
+
+
+def paginate_lines(lines: list, limit: int = MAX_MESSAGE_LENGTH) -> list:
+    pages = []
+    page = []
+    size = 0
+    
+    for line in lines:
+        length = _message_length(line)
         
-        for opt in ["option_a", "option_b", "option_c", "option_d"]:
-            if not q.get(opt) or len(q[opt]) < 1:
-                return False, f"Question {idx}: Invalid option {opt}"
-            
-            if len(q[opt]) > 100:
-                return False, f"Question {idx}: Option {opt} too long (max 100 chars)"
+        if length > limit:
+            line = line[:limit // 2]
+            length = _message_length(line)
         
-        if q.get("correct_option") not in [0, 1, 2, 3]:
-            return False, f"Question {idx}: Invalid correct option"
+        if page and size + 1 + length > limit:
+            pages.append("\n".join(page))
+            page = []
+            size = 0
         
-        if q.get("explanation") and len(q["explanation"]) > 200:
-            return False, f"Question {idx}: Explanation too long (max 200 chars)"
+        size += length + (1 if page else 0)
+        page.append(line)
+    
+    if page:
+        pages.append("\n".join(page))
+    
+    return pages
+
+
+def format_stats(stats: dict, indent: int = 0) -> list:
+    lines = []
+    pad = "  " * indent
+    
+    for key, value in stats.items():
+        if isinstance(value, dict) and "p99" in value:
+            line = (
+                f"{pad}{key}: n={value['count']} avg={value['avg']:.1f} "
+                f"p50={value['p50']:.0f} p99={value['p99']:.0f} max={value['max']:.0f}"
+            )
+            if value.get("failures"):
+                line += f" failures={value['failures']}"
+            lines.append(line)
+        elif isinstance(value, dict):
+            lines.append(f"{pad}{key}:")
+            lines.extend(format_stats(value, indent + 1))
+        elif isinstance(value, float):
+            lines.append(f"{pad}{key}: {value:.1f}")
+        else:
+            lines.append(f"{pad}{key}: {value}")
     
-    return True, ""
+    return lines
@@ -0,0 +1,70 @@
+import asyncio
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    def __init__(self, kind: str, max_workers: int, timeout: float):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        
+        self.kind = kind
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = None
+        self.duration = Histogram()
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.in_flight = 0
+    
+    def start(self):
+        if self._executor is None:
+            executor_cls = ProcessPoolExecutor if self.kind == "process" else ThreadPoolExecutor
+            self._executor = executor_cls(max_workers=self.max_workers)
+    
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def run(self, fn, *args, timeout: float = None):
+        self.start()
+        
+        timeout = timeout or self.timeout
+        started = time.monotonic()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        self.in_flight += 1
+        
+        try:
+            # Cancelling the wrapper drops queued jobs; jobs already running are
+            # expected to honour the deadline they were given and stop on their own
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Worker job {fn.__name__} timed out after {timeout}s")
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        
+        self.completed += 1
+        self.duration.observe((time.monotonic() - started) * 1000)
+        return result
+    
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "duration_ms": self.duration.summary()
+        }